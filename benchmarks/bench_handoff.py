@@ -0,0 +1,82 @@
+"""Node transition latency and allocation, agent handoff vs in-place switch
+
+Only the library side is measured: a real handoff also restarts the agent
+activity inside livekit-agents, which makes the gap larger in production.
+
+Run with: uv run python benchmarks/bench_handoff.py [--nodes 50] [--hops 2000]
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+from unittest.mock import PropertyMock, patch
+
+from livekit_flows import FlowAgent, compile_flow
+
+from bench_transitions import build_flow
+
+
+class FakeSession:
+    def __init__(self):
+        self.userdata = None
+        self.current_agent = None
+
+    def update_agent(self, agent):
+        self.current_agent = agent
+
+    def say(self, text):
+        return None
+
+    def generate_reply(self, instructions):
+        return None
+
+
+async def run(label: str, flow, mode: str, hops: int) -> None:
+    flow = flow.model_copy(
+        update={"settings": flow.settings.model_copy(update={"transition_mode": mode})}
+    )
+    compiled = compile_flow(flow)
+    session = FakeSession()
+    session.current_agent = FlowAgent(compiled)
+    node_count = len(flow.nodes)
+
+    with patch.object(
+        FlowAgent, "session", new_callable=PropertyMock, return_value=session
+    ):
+        tracemalloc.start()
+        peak_total = 0
+        start = time.perf_counter()
+        for i in range(hops):
+            tracemalloc.reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            agent = session.current_agent
+            await agent.handle_transition(f"node_{(i + 1) % node_count}", None)
+            if session.current_agent is not agent:
+                # A handoff runs the exit and entry hooks from the session
+                await agent.on_exit()
+                await session.current_agent.on_enter()
+            peak_total += tracemalloc.get_traced_memory()[1] - current
+        elapsed = time.perf_counter() - start
+        tracemalloc.stop()
+
+    print(
+        f"{label:<28} {elapsed / hops * 1e6:>10.1f} us/transition "
+        f"{peak_total / hops:>10.0f} bytes allocated/transition"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=50)
+    parser.add_argument("--hops", type=int, default=2000)
+    args = parser.parse_args()
+
+    flow = build_flow(args.nodes)
+    print(f"flow with {args.nodes} nodes, {args.hops} hops")
+    asyncio.run(run("handoff (new FlowAgent)", flow, "handoff", args.hops))
+    asyncio.run(run("in place", flow, "in_place", args.hops))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Import time of livekit_flows entry points, measured with -X importtime
+
+Run with: uv run python benchmarks/bench_import.py [--repeat 5]
+"""
+
+import argparse
+import subprocess
+import sys
+
+STATEMENTS = {
+    "interpreter only": "pass",
+    "import livekit_flows": "import livekit_flows",
+    "load a flow": "from livekit_flows import ConversationFlow",
+    "compile a flow": "from livekit_flows import compile_flow",
+    "run an agent": "from livekit_flows import FlowAgent",
+}
+
+
+def import_times(statement: str) -> dict[str, int]:
+    """Cumulative import time in microseconds of every module the statement loads"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line.removeprefix("import time:").split("|")
+        times[module.strip()] = int(cumulative)
+    return times
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for label, statement in STATEMENTS.items():
+        samples = []
+        for _ in range(args.repeat):
+            times = import_times(statement)
+            samples.append(sum(t for m, t in times.items() if "." not in m))
+        heavy = [
+            m
+            for m in ("livekit.agents", "aiohttp", "jinja2", "jsonschema")
+            if m in times
+        ]
+        print(
+            f"{label:<24} {min(samples) / 1e3:>8.1f} ms  "
+            f"pulls in: {', '.join(heavy) or '-'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
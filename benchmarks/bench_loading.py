@@ -0,0 +1,93 @@
+"""Flow load time with the pure-Python parser, libyaml and the artifact cache
+
+Run with: uv run python benchmarks/bench_loading.py [--nodes 10 1000 10000]
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+
+from livekit_flows import ConversationFlow
+
+
+def build_flow_data(node_count: int) -> dict:
+    nodes = []
+    for i in range(node_count):
+        nodes.append(
+            {
+                "id": f"node_{i}",
+                "name": f"Node {i}",
+                "instruction": f"Ask for field {i}, you know {{{{ userdata.field_{i} }}}}",
+                "edges": [
+                    {
+                        "condition": f"User provided field {i}",
+                        "id": f"collect_{i}",
+                        "target_node_id": f"node_{(i + 1) % node_count}",
+                        "input_schema": {
+                            "type": "object",
+                            "properties": {
+                                f"field_{i}": {
+                                    "type": "string",
+                                    "description": f"Field {i}",
+                                }
+                            },
+                            "required": [f"field_{i}"],
+                        },
+                    }
+                ],
+            }
+        )
+    return {
+        "system_prompt": "Benchmark flow",
+        "initial_node": "node_0",
+        "nodes": nodes,
+    }
+
+
+def run(label: str, fn) -> None:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<36} {elapsed * 1e3:>10.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, nargs="+", default=[10, 1000, 10000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = Path(tmp)
+        for node_count in args.nodes:
+            data = build_flow_data(node_count)
+            yaml_path = tmp_dir / f"flow_{node_count}.yaml"
+            json_path = tmp_dir / f"flow_{node_count}.json"
+            yaml_path.write_text(yaml.safe_dump(data))
+            json_path.write_text(json.dumps(data))
+            cache_dir = tmp_dir / f"cache_{node_count}"
+
+            def pure_python_yaml() -> None:
+                # Previous behaviour: yaml.safe_load, then model_validate
+                with open(yaml_path, encoding="utf-8") as f:
+                    ConversationFlow.model_validate(yaml.safe_load(f))
+
+            print(f"flow with {node_count} nodes")
+            run("yaml.safe_load + validate", pure_python_yaml)
+            run("from_yaml_file", lambda: ConversationFlow.from_yaml_file(yaml_path))
+            run("from_json_file", lambda: ConversationFlow.from_json_file(json_path))
+            run(
+                "from_file, artifact cache miss",
+                lambda: ConversationFlow.from_file(yaml_path, cache_dir=cache_dir),
+            )
+            run(
+                "from_file, artifact cache hit",
+                lambda: ConversationFlow.from_file(yaml_path, cache_dir=cache_dir),
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Memory per active session with many simulated agents on one flow
+
+Run with: uv run python benchmarks/bench_memory.py [--sessions 1000 10000]
+"""
+
+import argparse
+import gc
+import tracemalloc
+
+from livekit_flows import FlowAgent, compile_flow
+from livekit_flows.actions import ActionExecutor
+from livekit_flows.templates import TemplateCache, TemplateRenderer
+
+from bench_transitions import build_flow
+
+
+def shared_executor(compiled, flow) -> ActionExecutor:
+    return ActionExecutor(compiled.actions, flow.environment_variables)
+
+
+def private_executor(compiled, flow) -> ActionExecutor:
+    # Previous behaviour: an action index and a Jinja environment per session
+    return ActionExecutor(
+        flow.actions,
+        flow.environment_variables,
+        template_renderer=TemplateRenderer(cache=TemplateCache()),
+    )
+
+
+def measure(session_count: int, flow, make_executor) -> float:
+    compiled = compile_flow(flow)
+    userdata_class = compiled.userdata_class
+    # Warm shared state so only per-session allocations are measured
+    FlowAgent(compiled)
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    sessions = []
+    for _ in range(session_count):
+        executor = make_executor(compiled, flow)
+        agent = FlowAgent(compiled, action_executor=executor)
+        sessions.append((agent, executor, userdata_class.model_construct()))
+
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / session_count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--nodes", type=int, default=50)
+    args = parser.parse_args()
+
+    flow = build_flow(args.nodes)
+    print(f"flow with {args.nodes} nodes")
+    for session_count in args.sessions:
+        for label, make_executor in (
+            ("per-session environment", private_executor),
+            ("shared environment", shared_executor),
+        ):
+            per_session = measure(session_count, flow, make_executor)
+            print(
+                f"{session_count:>8} sessions  {label:<26} "
+                f"{per_session:>10.0f} bytes/session"
+            )
+
+
+if __name__ == "__main__":
+    main()
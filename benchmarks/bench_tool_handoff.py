@@ -0,0 +1,112 @@
+"""Time to the next node's first reply after a transition, with and without
+handing the next agent back through the tool result
+
+Needs OPENAI_API_KEY. The session runs in text mode, so the first assistant
+message stands in for the first audio frame.
+
+Run with: uv run python benchmarks/bench_tool_handoff.py [--runs 10]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from unittest.mock import patch
+
+from dotenv import load_dotenv
+from livekit.agents import AgentSession
+from livekit.agents.llm import ChatMessage
+from livekit.plugins import openai
+
+from livekit_flows import ConversationFlow, Edge, FlowAgent, FlowNode
+
+
+def build_flow(tool_handoff: bool) -> ConversationFlow:
+    return ConversationFlow(
+        system_prompt="You are a voice agent taking restaurant reservations.",
+        initial_node="welcome",
+        settings={"tool_handoff": tool_handoff},
+        nodes=[
+            FlowNode(
+                id="welcome",
+                name="Welcome",
+                static_text="Hi! What's your name?",
+                edges=[
+                    Edge(
+                        condition="Got name",
+                        id="collect_name",
+                        target_node_id="details",
+                        input_schema={
+                            "type": "object",
+                            "properties": {"name": {"type": "string"}},
+                            "required": ["name"],
+                        },
+                    )
+                ],
+            ),
+            FlowNode(
+                id="details",
+                name="Details",
+                instruction="Greet {{ userdata.name }} and ask for the party size.",
+            ),
+        ],
+    )
+
+
+async def measure(tool_handoff: bool) -> tuple[float, int]:
+    """Seconds from the user turn to the new node's reply, and LLM calls made"""
+    async with (
+        openai.LLM(model="gpt-4o-mini") as llm,
+        AgentSession(llm=llm) as session,
+    ):
+        replies: list[float] = []
+        llm_calls = 0
+
+        @session.on("conversation_item_added")
+        def on_item(event):
+            if isinstance(event.item, ChatMessage) and event.item.role == "assistant":
+                replies.append(time.perf_counter())
+
+        @session.on("metrics_collected")
+        def on_metrics(event):
+            nonlocal llm_calls
+            if event.metrics.type == "llm_metrics":
+                llm_calls += 1
+
+        await session.start(FlowAgent(build_flow(tool_handoff)))
+        await session.run(user_input="Hello")
+
+        replies.clear()
+        llm_calls = 0
+        start = time.perf_counter()
+        await session.run(user_input="I'm Alice Johnson")
+        if not replies:
+            raise RuntimeError("The new node did not reply")
+        return replies[0] - start, llm_calls
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    for label, tool_handoff in (
+        ("update_agent side effect", False),
+        ("agent returned from tool", True),
+    ):
+        latencies, calls = [], []
+        for _ in range(args.runs):
+            latency, llm_calls = await measure(tool_handoff)
+            latencies.append(latency)
+            calls.append(llm_calls)
+        print(
+            f"{label:<28} median {statistics.median(latencies) * 1e3:>8.0f} ms  "
+            f"p90 {statistics.quantiles(latencies, n=10)[-1] * 1e3:>8.0f} ms  "
+            f"{statistics.mean(calls):.1f} LLM calls/transition"
+        )
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    with patch("livekit_flows.agent.session.get_job_context", return_value=None):
+        asyncio.run(main())
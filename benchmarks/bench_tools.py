@@ -0,0 +1,65 @@
+"""Tool construction cost per transition
+
+Run with: uv run python benchmarks/bench_tools.py [--edges 8] [--iterations 5000]
+"""
+
+import argparse
+import time
+
+from livekit_flows import ConversationFlow, Edge, FlowNode, compile_flow
+from livekit_flows.agent import ToolFactory
+
+
+def build_flow(edge_count: int) -> ConversationFlow:
+    edges = []
+    for i in range(edge_count):
+        input_schema = None
+        if i % 2:
+            input_schema = {
+                "type": "object",
+                "properties": {f"field_{i}": {"type": "string"}},
+                "required": [f"field_{i}"],
+            }
+        edges.append(
+            Edge(
+                condition=f"Condition {i}",
+                id=f"edge_{i}",
+                target_node_id="start",
+                input_schema=input_schema,
+            )
+        )
+    return ConversationFlow(
+        system_prompt="Benchmark flow",
+        initial_node="start",
+        nodes=[FlowNode(id="start", name="Start", edges=edges)],
+    )
+
+
+def run(label: str, iterations: int, fn) -> None:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {elapsed / iterations * 1e6:>10.1f} us/node")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--edges", type=int, default=8)
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    node = compile_flow(build_flow(args.edges)).initial_node
+    factory = ToolFactory()
+
+    print(f"node with {args.edges} edges, {args.iterations} iterations")
+    run(
+        "build tools every time",
+        args.iterations,
+        lambda: factory.build_tools_for_node(node),
+    )
+    run("reuse tools per node", args.iterations, lambda: factory.tools_for_node(node))
+
+
+if __name__ == "__main__":
+    main()
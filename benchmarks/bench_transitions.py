@@ -0,0 +1,87 @@
+"""Transitions per second with and without the shared userdata class
+
+Run with: uv run python benchmarks/bench_transitions.py [--nodes 50] [--hops 2000]
+"""
+
+import argparse
+import time
+
+from livekit_flows import ConversationFlow, Edge, FlowAgent, FlowNode, compile_flow
+from livekit_flows.utils import generate_userdata_class
+
+
+def build_flow(node_count: int) -> ConversationFlow:
+    nodes = []
+    for i in range(node_count):
+        nodes.append(
+            FlowNode(
+                id=f"node_{i}",
+                name=f"Node {i}",
+                instruction=f"Ask for field {i}, you know {{{{ userdata.field_{i} }}}}",
+                edges=[
+                    Edge(
+                        condition=f"User provided field {i}",
+                        id=f"collect_{i}",
+                        target_node_id=f"node_{(i + 1) % node_count}",
+                        input_schema={
+                            "type": "object",
+                            "properties": {
+                                f"field_{i}": {
+                                    "type": "string",
+                                    "description": f"Field {i}",
+                                }
+                            },
+                            "required": [f"field_{i}"],
+                        },
+                    )
+                ],
+            )
+        )
+    return ConversationFlow(
+        system_prompt="Benchmark flow", initial_node="node_0", nodes=nodes
+    )
+
+
+def run(label: str, hops: int, hop) -> None:
+    start = time.perf_counter()
+    for i in range(hops):
+        hop(i)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {hops / elapsed:>12.0f} transitions/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=50)
+    parser.add_argument("--hops", type=int, default=2000)
+    args = parser.parse_args()
+
+    flow = build_flow(args.nodes)
+    compiled = compile_flow(flow)
+    nodes = flow.nodes
+
+    def regenerate(i: int) -> None:
+        # Previous behaviour: every FlowAgent regenerated the userdata class
+        generate_userdata_class(flow, use_cache=False)
+        FlowAgent(compiled, nodes[i % len(nodes)])
+
+    def shared(i: int) -> None:
+        FlowAgent(compiled, nodes[i % len(nodes)])
+
+    print(f"flow with {args.nodes} data-collection nodes, {args.hops} hops")
+    run("create_model on every transition", args.hops, regenerate)
+    run("memoized userdata class", args.hops, shared)
+    run(
+        "generate_userdata_class (uncached)",
+        args.hops,
+        lambda i: generate_userdata_class(flow, use_cache=False),
+    )
+    run(
+        "generate_userdata_class (cached)",
+        args.hops,
+        lambda i: generate_userdata_class(flow),
+    )
+
+
+if __name__ == "__main__":
+    main()
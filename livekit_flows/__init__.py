@@ -1,30 +1,71 @@
+from importlib import import_module
+from typing import TYPE_CHECKING
+
 from .version import __version__
 
-from .core import (
-    ConversationFlow,
-    FlowNode,
-    Edge,
-    HttpMethod,
-    ActionTriggerType,
-)
+# Public names are resolved on first access (PEP 562), so loading or
+# validating a flow does not import livekit.agents, aiohttp or jinja2
+_LAZY_ATTRIBUTES = {
+    "ConversationFlow": ".core",
+    "FlowSettings": ".core",
+    "FlowNode": ".core",
+    "Edge": ".core",
+    "HttpMethod": ".core",
+    "ActionTriggerType": ".core",
+    "CustomAction": ".core",
+    "ActionTrigger": ".core",
+    "ActionCacheConfig": ".core",
+    "CompiledFlow": ".compiler",
+    "compile_flow": ".compiler",
+    "FlowSource": ".compiler",
+    "FlowRegistry": ".compiler",
+    "FlowAgent": ".agent",
+}
+
+if TYPE_CHECKING:
+    from .core import (
+        ConversationFlow,
+        FlowSettings,
+        FlowNode,
+        Edge,
+        HttpMethod,
+        ActionTriggerType,
+        CustomAction,
+        ActionTrigger,
+        ActionCacheConfig,
+    )
+    from .compiler import CompiledFlow, FlowRegistry, FlowSource, compile_flow
+    from .agent import FlowAgent
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
 
-from .actions import (
-    CustomAction,
-    ActionTrigger,
-)
+def __dir__() -> list[str]:
+    return sorted({*globals(), *_LAZY_ATTRIBUTES})
 
-from .agent import (
-    FlowAgent,
-)
 
 __all__ = [
     "__version__",
     "ConversationFlow",
+    "FlowSettings",
     "FlowNode",
     "Edge",
     "HttpMethod",
     "ActionTriggerType",
     "CustomAction",
     "ActionTrigger",
+    "ActionCacheConfig",
+    "CompiledFlow",
+    "compile_flow",
+    "FlowSource",
+    "FlowRegistry",
     "FlowAgent",
 ]
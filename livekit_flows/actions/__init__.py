@@ -1,8 +1,102 @@
-from ..core import CustomAction, ActionTrigger
-from .executor import ActionExecutor
+from ..core import (
+    CustomAction,
+    ActionTrigger,
+    ActionCacheConfig,
+    RetryPolicy,
+    LatencyPolicy,
+    CircuitBreakerConfig,
+    RateLimitConfig,
+)
+from .executor import ActionExecutor, ActionRequest
+from .cache import (
+    ResponseCache,
+    ResponseCacheStats,
+    get_response_cache,
+    response_cache_stats,
+    clear_response_caches,
+)
+from .singleflight import SingleFlight, SingleFlightStats, get_single_flight
+from .prefetch import PrefetchStats, prefetch_stats
+from .response import ResponseTooLargeError, extract_path
+from .latency import (
+    LatencyTracker,
+    LatencyStats,
+    get_latency_tracker,
+    latency_stats,
+    clear_latency_trackers,
+)
+from .circuit_breaker import (
+    CircuitBreaker,
+    CircuitBreakerStats,
+    CircuitOpenError,
+    CircuitState,
+    get_circuit_breaker,
+    circuit_breaker_stats,
+    clear_circuit_breakers,
+)
+from .rate_limit import (
+    RateLimiter,
+    RateLimiterStats,
+    RateLimitExceededError,
+    get_rate_limiter,
+    rate_limiter_stats,
+    clear_rate_limiters,
+)
+from .scheduler import schedule_actions
+from .http import (
+    HttpClientPool,
+    HttpPoolConfig,
+    HttpPoolStats,
+    get_http_pool,
+    configure_http_pool,
+    close_http_pool,
+)
 
 __all__ = [
     "CustomAction",
     "ActionTrigger",
+    "ActionCacheConfig",
+    "RetryPolicy",
+    "LatencyPolicy",
+    "CircuitBreakerConfig",
+    "RateLimitConfig",
     "ActionExecutor",
+    "ActionRequest",
+    "ResponseCache",
+    "ResponseCacheStats",
+    "get_response_cache",
+    "response_cache_stats",
+    "clear_response_caches",
+    "SingleFlight",
+    "SingleFlightStats",
+    "get_single_flight",
+    "PrefetchStats",
+    "prefetch_stats",
+    "ResponseTooLargeError",
+    "extract_path",
+    "LatencyTracker",
+    "LatencyStats",
+    "get_latency_tracker",
+    "latency_stats",
+    "clear_latency_trackers",
+    "CircuitBreaker",
+    "CircuitBreakerStats",
+    "CircuitOpenError",
+    "CircuitState",
+    "get_circuit_breaker",
+    "circuit_breaker_stats",
+    "clear_circuit_breakers",
+    "RateLimiter",
+    "RateLimiterStats",
+    "RateLimitExceededError",
+    "get_rate_limiter",
+    "rate_limiter_stats",
+    "clear_rate_limiters",
+    "schedule_actions",
+    "HttpClientPool",
+    "HttpPoolConfig",
+    "HttpPoolStats",
+    "get_http_pool",
+    "configure_http_pool",
+    "close_http_pool",
 ]
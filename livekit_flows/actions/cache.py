@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+import time
+
+
+@dataclass
+class CachedResponse:
+    response_data: dict[str, Any]
+    expires_at: float
+    etag: str | None = None
+
+    def is_fresh(self, now: float | None = None) -> bool:
+        return (time.monotonic() if now is None else now) < self.expires_at
+
+
+@dataclass(frozen=True)
+class ResponseCacheStats:
+    hits: int
+    misses: int
+    revalidations: int
+    evictions: int
+    size: int
+    max_entries: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class ResponseCache:
+    """LRU cache of action responses with per-entry expiry
+
+    Expired entries that carry an ETag are kept so the next request can be
+    revalidated with If-None-Match instead of refetched.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._revalidations = 0
+        self._evictions = 0
+
+    def lookup(self, key: str) -> CachedResponse | None:
+        """Return the entry for key, fresh or stale, counting fresh ones as hits"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self._misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        if entry.is_fresh(time.monotonic()):
+            self._hits += 1
+        elif entry.etag is None:
+            del self._entries[key]
+            self._misses += 1
+            return None
+        else:
+            self._misses += 1
+        return entry
+
+    def store(
+        self,
+        key: str,
+        response_data: dict[str, Any],
+        ttl: float,
+        etag: str | None = None,
+    ) -> None:
+        self._entries[key] = CachedResponse(
+            response_data=response_data,
+            expires_at=time.monotonic() + ttl,
+            etag=etag,
+        )
+        self._entries.move_to_end(key)
+        self._evict()
+
+    def resize(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._evict()
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def refresh(self, key: str, entry: CachedResponse, ttl: float) -> None:
+        """Extend a stale entry after a 304 Not Modified"""
+        entry.expires_at = time.monotonic() + ttl
+        self._entries[key] = entry
+        self._revalidations += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> ResponseCacheStats:
+        return ResponseCacheStats(
+            hits=self._hits,
+            misses=self._misses,
+            revalidations=self._revalidations,
+            evictions=self._evictions,
+            size=len(self._entries),
+            max_entries=self.max_entries,
+        )
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+_response_caches: dict[str, ResponseCache] = {}
+
+
+def get_response_cache(action_id: str, max_entries: int = 1024) -> ResponseCache:
+    """Return the process-wide response cache of an action
+
+    `action_id` is prefixed with the flow's namespace when the executor has
+    one. A cache created with another `max_entries` is resized.
+    """
+    cache = _response_caches.get(action_id)
+    if cache is None:
+        cache = _response_caches[action_id] = ResponseCache(max_entries)
+    elif cache.max_entries != max_entries:
+        cache.resize(max_entries)
+    return cache
+
+
+def response_cache_stats() -> dict[str, ResponseCacheStats]:
+    return {action_id: cache.stats() for action_id, cache in _response_caches.items()}
+
+
+def clear_response_caches() -> None:
+    _response_caches.clear()
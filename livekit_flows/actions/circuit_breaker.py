@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+import time
+
+from ..core import CircuitBreakerConfig
+from .state import config_fingerprint, state_labels
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, key: str):
+        super().__init__(f"Circuit open for {key}")
+        self.key = key
+
+
+@dataclass(frozen=True)
+class CircuitBreakerStats:
+    state: CircuitState
+    failure_rate: float
+    calls: int
+    times_opened: int
+    rejected: int
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker over a window of recent calls"""
+
+    def __init__(self, config: CircuitBreakerConfig):
+        self.config = config
+        self.state = CircuitState.CLOSED
+        self._outcomes: deque[bool] = deque(maxlen=config.window)
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        self._times_opened = 0
+        self._rejected = 0
+
+    @property
+    def failure_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+    def allow(self) -> bool:
+        if self.state == CircuitState.OPEN:
+            if time.monotonic() - self._opened_at < self.config.open_seconds:
+                self._rejected += 1
+                return False
+            self.state = CircuitState.HALF_OPEN
+            self._half_open_calls = 0
+
+        if self.state == CircuitState.HALF_OPEN:
+            if self._half_open_calls >= self.config.half_open_max_calls:
+                self._rejected += 1
+                return False
+            self._half_open_calls += 1
+
+        return True
+
+    def release_probe(self) -> None:
+        """Give back a half-open slot whose call ended without an outcome"""
+        if self.state == CircuitState.HALF_OPEN and self._half_open_calls > 0:
+            self._half_open_calls -= 1
+
+    def record_success(self) -> None:
+        if self.state == CircuitState.HALF_OPEN:
+            self.state = CircuitState.CLOSED
+            self._outcomes.clear()
+        self._outcomes.append(True)
+
+    def record_failure(self) -> None:
+        if self.state == CircuitState.HALF_OPEN:
+            self._open()
+            return
+
+        self._outcomes.append(False)
+        if (
+            len(self._outcomes) >= self.config.min_calls
+            and self.failure_rate >= self.config.failure_threshold
+        ):
+            self._open()
+
+    def _open(self) -> None:
+        self.state = CircuitState.OPEN
+        self._opened_at = time.monotonic()
+        self._times_opened += 1
+
+    def stats(self) -> CircuitBreakerStats:
+        return CircuitBreakerStats(
+            state=self.state,
+            failure_rate=self.failure_rate,
+            calls=len(self._outcomes),
+            times_opened=self._times_opened,
+            rejected=self._rejected,
+        )
+
+
+_circuit_breakers: dict[tuple[str, str], CircuitBreaker] = {}
+
+
+def get_circuit_breaker(key: str, config: CircuitBreakerConfig) -> CircuitBreaker:
+    """Return the process-wide breaker for a host or action key and config
+
+    Like rate limiters, callers declaring different settings for one key get
+    separate breakers rather than resetting a shared one.
+    """
+    state_key = (key, config_fingerprint(config))
+    breaker = _circuit_breakers.get(state_key)
+    if breaker is None:
+        breaker = _circuit_breakers[state_key] = CircuitBreaker(config)
+    return breaker
+
+
+def circuit_breaker_stats() -> dict[str, CircuitBreakerStats]:
+    labels = state_labels(_circuit_breakers)
+    return {labels[key]: breaker.stats() for key, breaker in _circuit_breakers.items()}
+
+
+def clear_circuit_breakers() -> None:
+    _circuit_breakers.clear()
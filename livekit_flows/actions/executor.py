@@ -1,105 +1,538 @@
-from typing import Any, Optional
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
+from typing import Any, Collection, Mapping
+from urllib.parse import urlsplit
 import aiohttp
+import asyncio
+import copy
+import hashlib
 import json
 import logging
+import random
 from pydantic import BaseModel
 
 from ..core import CustomAction
-from ..templates import TemplateRenderer
+from ..templates import TemplateContext, TemplateRenderer, get_template_renderer
+from .cache import get_response_cache
+from .http import HttpClientPool, get_http_pool
+from .singleflight import get_single_flight
+from .response import read_body, decode_body, project, filter_headers
+from .latency import get_latency_tracker
+from .circuit_breaker import CircuitOpenError, get_circuit_breaker
+from .rate_limit import RateLimitExceededError, get_rate_limiter
+from .prefetch import PrefetchedRequest, prefetch_metrics
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True)
+class ActionRequest:
+    method: str
+    url: str
+    headers: dict[str, str]
+    body: Any = None
+
+    def key(self, vary_headers: list[str] | None = None) -> str:
+        """Stable key of the rendered request, limited to the selected headers"""
+        selected = {name.lower() for name in vary_headers or []}
+        headers = {
+            name.lower(): value
+            for name, value in self.headers.items()
+            if name.lower() in selected
+        }
+        payload = json.dumps(
+            [self.method, self.url, headers, self.body], sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
 class ActionExecutor:
-    """Executes HTTP actions with template rendering support"""
+    """Executes HTTP actions with template rendering support
+
+    One executor holds the action results of a session. Pass the compiled
+    flow's `actions` mapping to share it instead of indexing a list per session.
+    Latency, cache and limit state is process-wide per action id, prefixed with
+    `namespace` when given so equal ids of different flows stay apart.
+    """
+
+    __slots__ = (
+        "actions",
+        "environment_vars",
+        "action_results",
+        "http_pool",
+        "template_renderer",
+        "template_context",
+        "namespace",
+        "_prefetched",
+        "_background_tasks",
+    )
 
     def __init__(
         self,
-        actions: list[CustomAction],
+        actions: list[CustomAction] | Mapping[str, CustomAction],
         environment_vars: dict[str, str] | None = None,
+        http_pool: HttpClientPool | None = None,
+        template_renderer: TemplateRenderer | None = None,
+        namespace: str | None = None,
     ):
-        self.actions = {action.id: action for action in actions}
+        if isinstance(actions, Mapping):
+            self.actions = actions
+        else:
+            self.actions = {action.id: action for action in actions}
         self.environment_vars = environment_vars or {}
         self.action_results: dict[str, Any] = {}
-        self._http_session: Optional[aiohttp.ClientSession] = None
-        self.template_renderer = TemplateRenderer()
+        self.http_pool = http_pool or get_http_pool()
+        self.template_renderer = template_renderer or get_template_renderer()
+        self.template_context = TemplateContext(
+            self.environment_vars, self.action_results
+        )
+        self.namespace = namespace
+        self._prefetched: dict[str, PrefetchedRequest] = {}
+        self._background_tasks: set[asyncio.Task] = set()
 
     async def __aenter__(self):
-        self._http_session = aiohttp.ClientSession()
+        # Connections live in the shared pool, kept for backwards compatibility
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self._http_session:
-            await self._http_session.close()
+        pass
 
     async def execute_action(
-        self, action_id: str, userdata: BaseModel | None = None
+        self,
+        action_id: str,
+        userdata: BaseModel | None = None,
+        deadline: float | None = None,
     ) -> dict[str, Any]:
+        """Execute an action, `deadline` is an absolute event loop time budget"""
         if action_id not in self.actions:
             logger.error(f"Action {action_id} not found")
             return {}
 
         action = self.actions[action_id]
-        context = self.template_renderer.build_context(
-            userdata=userdata,
-            environment_vars=self.environment_vars,
-            action_results=self.action_results,
+
+        try:
+            request = self._render_request(action, userdata)
+            logger.info(f"Executing action {action_id}: {request.method} {request.url}")
+            prefetched = self._take_prefetched(action_id, request)
+            if prefetched is not None:
+                response_data = await prefetched
+            else:
+                response_data = await self._execute_request(action, request, deadline)
+            logger.info(
+                f"Action {action_id} completed with status {response_data['status']}"
+            )
+
+        except (CircuitOpenError, RateLimitExceededError) as e:
+            logger.warning(f"Action {action_id} failed fast: {e}")
+            status = 429 if isinstance(e, RateLimitExceededError) else 503
+            response_data = {"success": False, "error": str(e), "status": status}
+            if action.fallback_result is not None:
+                response_data.update(copy.deepcopy(action.fallback_result))
+
+        except Exception as e:
+            logger.error(f"Action {action_id} failed: {e}")
+            response_data = {"success": False, "error": str(e), "status": 500}
+
+        if action.store_response_as:
+            self.action_results[action.store_response_as] = response_data
+
+        return response_data
+
+    def run_in_background(self, action_id: str, userdata: BaseModel | None = None):
+        """Execute an action without waiting for it, keeping the task referenced"""
+        task = asyncio.ensure_future(self.execute_action(action_id, userdata))
+        self.track_task(task)
+        return task
+
+    def track_task(self, task: asyncio.Future) -> None:
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    def prefetch_action(
+        self, action_id: str, userdata: BaseModel | None = None
+    ) -> bool:
+        """Start a prefetch-safe action in the background ahead of node entry"""
+        action = self.actions.get(action_id)
+        if action is None or not action.prefetch or action_id in self._prefetched:
+            return False
+
+        try:
+            request = self._render_request(action, userdata)
+        except Exception as e:
+            logger.warning(f"Prefetch of action {action_id} skipped: {e}")
+            return False
+
+        task = asyncio.create_task(self._execute_request(action, request))
+        task.add_done_callback(_consume_task_exception)
+        self._prefetched[action_id] = PrefetchedRequest(
+            key=request.key(list(request.headers)), task=task
         )
+        prefetch_metrics.started += 1
+        logger.debug(f"Prefetching action {action_id}: {request.method} {request.url}")
+        return True
+
+    def discard_prefetches(self, keep: Collection[str] = ()) -> None:
+        """Cancel prefetches that the entered node did not use
+
+        Prefetches of the actions in `keep` stay available, for actions the
+        node runs in the background or after their dependencies.
+        """
+        for action_id in list(self._prefetched):
+            if action_id in keep:
+                continue
+            self._prefetched.pop(action_id).task.cancel()
+            prefetch_metrics.discarded += 1
+
+    def _take_prefetched(
+        self, action_id: str, request: ActionRequest
+    ) -> asyncio.Task | None:
+        prefetched = self._prefetched.pop(action_id, None)
+        if prefetched is None:
+            return None
+
+        if prefetched.key != request.key(list(request.headers)):
+            # The request changed since the prefetch, e.g. new userdata in the URL
+            prefetched.task.cancel()
+            prefetch_metrics.stale += 1
+            return None
+
+        prefetch_metrics.hits += 1
+        return prefetched.task
+
+    def _state_key(self, action: CustomAction) -> str:
+        if self.namespace is None:
+            return action.id
+        return f"{self.namespace}/{action.id}"
+
+    def _scope_key(self, scope: str, action: CustomAction, url: str) -> str:
+        if scope == "host":
+            return f"host:{urlsplit(url).netloc}"
+        return f"action:{self._state_key(action)}"
+
+    def _render_request(
+        self, action: CustomAction, userdata: BaseModel | None = None
+    ) -> ActionRequest:
+        render = self.template_renderer.render_in
+        context = self.template_context
+        url = render(action.url, context, userdata)
+
+        headers = {}
+        for key, value in action.headers.items():
+            headers[key] = render(value, context, userdata)
+
+        body = None
+        if action.body_template:
+            body_str = render(action.body_template, context, userdata)
+            try:
+                body = json.loads(body_str)
+            except json.JSONDecodeError:
+                body = body_str
+
+        return ActionRequest(
+            method=action.method.value, url=url, headers=headers, body=body
+        )
+
+    async def _execute_request(
+        self,
+        action: CustomAction,
+        request: ActionRequest,
+        deadline: float | None = None,
+    ) -> dict[str, Any]:
+        if not action.coalesce:
+            return await self._fetch(action, request, deadline)
+
+        # Only requests identical down to every header share a flight
+        key = f"{self._state_key(action)}:{request.key(list(request.headers))}"
+        response_data = await get_single_flight().do(
+            key, lambda: self._fetch(action, request, deadline)
+        )
+        return copy.deepcopy(response_data)
+
+    async def _fetch(
+        self,
+        action: CustomAction,
+        request: ActionRequest,
+        deadline: float | None = None,
+    ) -> dict[str, Any]:
+        if action.cache is None:
+            response_data, _ = await self._send_guarded(action, request, deadline)
+            return response_data
+
+        cache = get_response_cache(self._state_key(action), action.cache.max_entries)
+        vary_headers = action.cache.vary_headers
+        key = request.key(
+            list(request.headers) if vary_headers is None else vary_headers
+        )
+        entry = cache.lookup(key)
+
+        if entry is not None and entry.is_fresh():
+            return copy.deepcopy(entry.response_data)
+
+        extra_headers = {}
+        if entry is not None and entry.etag and action.cache.revalidate:
+            extra_headers["If-None-Match"] = entry.etag
+
+        response_data, etag = await self._send_guarded(
+            action, request, deadline, extra_headers
+        )
+
+        if response_data["status"] == 304 and entry is not None:
+            cache.refresh(key, entry, action.cache.ttl)
+            return copy.deepcopy(entry.response_data)
+
+        if response_data["success"]:
+            cache.store(
+                key,
+                copy.deepcopy(response_data),
+                action.cache.ttl,
+                etag if action.cache.revalidate else None,
+            )
+
+        return response_data
+
+    async def _send_guarded(
+        self,
+        action: CustomAction,
+        request: ActionRequest,
+        deadline: float | None = None,
+        extra_headers: dict[str, str] | None = None,
+    ) -> tuple[dict[str, Any], str | None]:
+        """Send through the action's circuit breaker, failing fast while open"""
+        config = action.circuit_breaker
+        if config is None:
+            return await self._send_with_policies(
+                action, request, deadline, extra_headers
+            )
+
+        key = self._scope_key(config.scope, action, request.url)
+        breaker = get_circuit_breaker(key, config)
+
+        if not breaker.allow():
+            raise CircuitOpenError(key)
 
         try:
-            url = self.template_renderer.render(action.url, context)
+            response_data, etag = await self._send_with_policies(
+                action, request, deadline, extra_headers
+            )
+        except RateLimitExceededError:
+            # Rejected locally, the backend was never called
+            breaker.release_probe()
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+        except BaseException:
+            # Cancelled, e.g. a discarded prefetch: the call has no outcome
+            breaker.release_probe()
+            raise
+
+        if response_data["status"] >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return response_data, etag
+
+    def _attempt_timeout(self, action: CustomAction) -> float:
+        timeout = float(action.timeout)
+
+        policy = action.latency
+        if policy is not None and policy.adaptive_timeout:
+            observed = get_latency_tracker(self._state_key(action)).percentile(
+                policy.timeout_percentile, policy.min_samples
+            )
+            if observed is not None:
+                timeout = min(
+                    timeout,
+                    max(policy.min_timeout, observed * policy.timeout_multiplier),
+                )
+
+        return timeout
+
+    def _retry_delay(
+        self,
+        action: CustomAction,
+        attempt: int,
+        deadline: float | None,
+    ) -> float | None:
+        """Jittered backoff before the next attempt, None when out of budget"""
+        policy = action.retry
+        if policy is None or attempt >= policy.max_attempts:
+            return None
+        if not (action.method.is_idempotent or policy.retry_non_idempotent):
+            return None
 
-            headers = {}
-            for key, value in action.headers.items():
-                headers[key] = self.template_renderer.render(value, context)
+        delay = random.uniform(
+            0, min(policy.max_delay, policy.base_delay * 2 ** (attempt - 1))
+        )
+        if deadline is not None:
+            remaining = deadline - asyncio.get_running_loop().time()
+            # Leave the retry at least the time the first attempt usually takes
+            expected = (
+                get_latency_tracker(self._state_key(action)).percentile(0.5) or 0.0
+            )
+            if delay + expected >= remaining:
+                return None
+        return delay
 
-            body = None
-            if action.body_template:
-                body_str = self.template_renderer.render(action.body_template, context)
-                try:
-                    body = json.loads(body_str)
-                except json.JSONDecodeError:
-                    body = body_str
+    async def _send_with_policies(
+        self,
+        action: CustomAction,
+        request: ActionRequest,
+        deadline: float | None = None,
+        extra_headers: dict[str, str] | None = None,
+    ) -> tuple[dict[str, Any], str | None]:
+        """Send with adaptive timeouts, hedging and jittered retries
 
-            logger.info(f"Executing action {action_id}: {action.method} {url}")
+        Retries only start while the node deadline still leaves room for them.
+        """
+        tracker = get_latency_tracker(self._state_key(action))
+        retry_on_status = action.retry.retry_on_status if action.retry else []
+        attempt = 1
 
-            if not self._http_session:
-                raise RuntimeError(
-                    "HTTP session not initialized. Use async context manager."
+        while True:
+            timeout = self._attempt_timeout(action)
+            try:
+                response_data, etag = await self._send_hedged(
+                    action, request, timeout, extra_headers
                 )
+                if response_data["status"] not in retry_on_status:
+                    return response_data, etag
+                delay = self._retry_delay(action, attempt, deadline)
+                if delay is None:
+                    return response_data, etag
+                logger.warning(
+                    f"Action {action.id} returned {response_data['status']}, retrying"
+                )
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    tracker.timeouts += 1
+                    # The backend took at least this long, without the sample a
+                    # timeout below its new normal latency could never grow
+                    tracker.record(timeout)
+                delay = self._retry_delay(action, attempt, deadline)
+                if delay is None:
+                    raise
+                logger.warning(f"Action {action.id} attempt {attempt} failed: {e}")
+
+            tracker.retries += 1
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def _send_hedged(
+        self,
+        action: CustomAction,
+        request: ActionRequest,
+        timeout: float,
+        extra_headers: dict[str, str] | None = None,
+    ) -> tuple[dict[str, Any], str | None]:
+        policy = action.latency
+        hedge_after = None
+        if policy is not None and policy.hedge and action.method.is_idempotent:
+            hedge_after = get_latency_tracker(self._state_key(action)).percentile(
+                policy.hedge_percentile, policy.min_samples
+            )
+
+        if hedge_after is None or hedge_after >= timeout:
+            return await self._send(action, request, timeout, extra_headers)
+
+        tracker = get_latency_tracker(self._state_key(action))
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        primary = asyncio.ensure_future(
+            self._send(action, request, timeout, extra_headers)
+        )
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=hedge_after)
+            if done:
+                return primary.result()
 
-            async with self._http_session.request(
-                method=action.method.value,
-                url=url,
-                headers=headers,
-                json=body if isinstance(body, dict) else None,
-                data=body if isinstance(body, str) else None,
-                timeout=aiohttp.ClientTimeout(total=action.timeout),
-            ) as response:
-                response_data = {
-                    "status": response.status,
-                    "headers": dict(response.headers),
-                    "success": response.status < 400,
-                }
-
-                try:
-                    response_data["data"] = await response.json()
-                except (aiohttp.ContentTypeError, json.JSONDecodeError):
-                    response_data["data"] = await response.text()
-
-                if action.store_response_as:
-                    self.action_results[action.store_response_as] = response_data
-
-                logger.info(
-                    f"Action {action_id} completed with status {response.status}"
+            tracker.hedges += 1
+            hedge = asyncio.ensure_future(
+                self._send(action, request, timeout - hedge_after, extra_headers)
+            )
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
                 )
-                return response_data
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            tracker.hedge_wins += 1
+                            if primary in pending:
+                                # The primary took at least this long, leaving
+                                # it out would bias the percentiles low
+                                tracker.record(loop.time() - started)
+                        return task.result()
+            # Both failed, surface the primary's error
+            return primary.result()
+        finally:
+            for task in pending:
+                task.cancel()
 
-        except Exception as e:
-            logger.error(f"Action {action_id} failed: {e}")
-            error_result = {"success": False, "error": str(e), "status": 500}
+    async def _send(
+        self,
+        action: CustomAction,
+        request: ActionRequest,
+        timeout: float | None = None,
+        extra_headers: dict[str, str] | None = None,
+    ) -> tuple[dict[str, Any], str | None]:
+        """Send the request, returning the response data and its ETag
+
+        Every attempt, retry or hedge passes the action's rate limits.
+        """
+        async with AsyncExitStack() as stack:
+            for config in action.rate_limits:
+                key = self._scope_key(config.scope, action, request.url)
+                await stack.enter_async_context(
+                    get_rate_limiter(key, config).acquire(key)
+                )
+            return await self._send_request(action, request, timeout, extra_headers)
+
+    async def _send_request(
+        self,
+        action: CustomAction,
+        request: ActionRequest,
+        timeout: float | None = None,
+        extra_headers: dict[str, str] | None = None,
+    ) -> tuple[dict[str, Any], str | None]:
+        headers = request.headers
+        if extra_headers:
+            headers = {**headers, **extra_headers}
+        started = asyncio.get_running_loop().time()
+
+        async with self.http_pool.request(
+            method=request.method,
+            url=request.url,
+            headers=headers,
+            json=request.body if isinstance(request.body, dict) else None,
+            data=request.body if isinstance(request.body, str) else None,
+            timeout=aiohttp.ClientTimeout(
+                total=timeout if timeout is not None else action.timeout
+            ),
+        ) as response:
+            body = await read_body(response, action.max_response_bytes)
+            data = decode_body(response, body)
+            del body
+
+            if action.extract is not None:
+                data = project(data, action.extract)
+
+            get_latency_tracker(self._state_key(action)).record(
+                asyncio.get_running_loop().time() - started
+            )
+            response_data = {
+                "status": response.status,
+                "headers": filter_headers(
+                    dict(response.headers), action.response_headers
+                ),
+                "success": response.status < 400,
+                "data": data,
+            }
+            return response_data, response.headers.get("ETag")
 
-            if action.store_response_as:
-                self.action_results[action.store_response_as] = error_result
 
-            return error_result
+def _consume_task_exception(task: asyncio.Task) -> None:
+    if not task.cancelled():
+        task.exception()
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator
+import asyncio
+import logging
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class HttpPoolConfig:
+    # 0 means no limit. Requests waiting for a pooled connection spend that
+    # wait inside the action timeout, so caps here also inflate latency
+    # samples and trip breakers; prefer `rate_limits` to protect a backend
+    limit: int = 0
+    limit_per_host: int = 0
+    keepalive_timeout: float = 30.0
+    ttl_dns_cache: int | None = 300
+
+
+@dataclass(frozen=True)
+class HttpPoolStats:
+    in_flight: int
+    peak_in_flight: int
+    total_requests: int
+    failed_requests: int
+    sessions_created: int
+    limit: int
+    limit_per_host: int
+
+    @property
+    def utilization(self) -> float:
+        return self.in_flight / self.limit if self.limit else 0.0
+
+
+class HttpClientPool:
+    """Long-lived aiohttp session shared by every ActionExecutor in the process
+
+    The session is created lazily on the running event loop and recreated if
+    the loop changes, so one pool serves a whole worker process.
+    """
+
+    def __init__(self, config: HttpPoolConfig | None = None):
+        self.config = config or HttpPoolConfig()
+        self._session: aiohttp.ClientSession | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._in_flight = 0
+        self._peak_in_flight = 0
+        self._total_requests = 0
+        self._failed_requests = 0
+        self._sessions_created = 0
+
+    def configure(self, config: HttpPoolConfig) -> None:
+        """Set limits for sessions created from now on"""
+        if self._session is not None and not self._session.closed:
+            logger.warning(
+                "HTTP pool reconfigured while a session is open, "
+                "the new limits apply after the pool is closed"
+            )
+        self.config = config
+
+    def session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            if self._session is not None and not self._session.closed:
+                logger.warning("HTTP pool used from a new event loop, recreating")
+            self._session = self._create_session()
+            self._loop = loop
+        return self._session
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=self.config.limit,
+            limit_per_host=self.config.limit_per_host,
+            keepalive_timeout=self.config.keepalive_timeout,
+            use_dns_cache=self.config.ttl_dns_cache is not None,
+            ttl_dns_cache=self.config.ttl_dns_cache,
+        )
+        self._sessions_created += 1
+        return aiohttp.ClientSession(connector=connector)
+
+    @asynccontextmanager
+    async def request(
+        self, method: str, url: str, **kwargs: Any
+    ) -> AsyncIterator[aiohttp.ClientResponse]:
+        session = self.session()
+        self._in_flight += 1
+        self._total_requests += 1
+        self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+        try:
+            async with session.request(method, url, **kwargs) as response:
+                yield response
+        except BaseException:
+            self._failed_requests += 1
+            raise
+        finally:
+            self._in_flight -= 1
+
+    def stats(self) -> HttpPoolStats:
+        return HttpPoolStats(
+            in_flight=self._in_flight,
+            peak_in_flight=self._peak_in_flight,
+            total_requests=self._total_requests,
+            failed_requests=self._failed_requests,
+            sessions_created=self._sessions_created,
+            limit=self.config.limit,
+            limit_per_host=self.config.limit_per_host,
+        )
+
+    async def close(self) -> None:
+        session, self._session, self._loop = self._session, None, None
+        if session is not None and not session.closed:
+            await session.close()
+
+
+_shared_http_pool = HttpClientPool()
+
+
+def get_http_pool() -> HttpClientPool:
+    return _shared_http_pool
+
+
+def configure_http_pool(config: HttpPoolConfig) -> None:
+    _shared_http_pool.configure(config)
+
+
+async def close_http_pool() -> None:
+    """Shutdown hook, e.g. `ctx.add_shutdown_callback(close_http_pool)`"""
+    await _shared_http_pool.close()
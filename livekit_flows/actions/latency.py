@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+import math
+
+
+@dataclass(frozen=True)
+class LatencyStats:
+    samples: int
+    p50: float | None
+    p95: float | None
+    p99: float | None
+    retries: int
+    hedges: int
+    hedge_wins: int
+    timeouts: int
+
+
+class LatencyTracker:
+    """Sliding window of recent request latencies for one action"""
+
+    def __init__(self, window: int = 512):
+        self._samples: deque[float] = deque(maxlen=window)
+        self._sorted: list[float] | None = None
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.timeouts = 0
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self._sorted = None
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, q: float, min_samples: int = 1) -> float | None:
+        if len(self._samples) < max(min_samples, 1):
+            return None
+        if self._sorted is None:
+            self._sorted = sorted(self._samples)
+        index = min(len(self._sorted) - 1, max(0, math.ceil(q * len(self._sorted)) - 1))
+        return self._sorted[index]
+
+    def stats(self) -> LatencyStats:
+        return LatencyStats(
+            samples=len(self._samples),
+            p50=self.percentile(0.5),
+            p95=self.percentile(0.95),
+            p99=self.percentile(0.99),
+            retries=self.retries,
+            hedges=self.hedges,
+            hedge_wins=self.hedge_wins,
+            timeouts=self.timeouts,
+        )
+
+
+_latency_trackers: dict[str, LatencyTracker] = {}
+
+
+def get_latency_tracker(action_id: str) -> LatencyTracker:
+    """Return the process-wide tracker of an action
+
+    `action_id` is prefixed with the flow's namespace when the executor has one.
+    """
+    tracker = _latency_trackers.get(action_id)
+    if tracker is None:
+        tracker = _latency_trackers[action_id] = LatencyTracker()
+    return tracker
+
+
+def latency_stats() -> dict[str, LatencyStats]:
+    return {action_id: t.stats() for action_id, t in _latency_trackers.items()}
+
+
+def clear_latency_trackers() -> None:
+    _latency_trackers.clear()
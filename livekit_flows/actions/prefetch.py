@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import asyncio
+
+
+@dataclass
+class PrefetchedRequest:
+    key: str
+    task: asyncio.Task
+
+
+@dataclass(frozen=True)
+class PrefetchStats:
+    started: int
+    hits: int
+    stale: int
+    discarded: int
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.started if self.started else 0.0
+
+
+class PrefetchMetrics:
+    def __init__(self):
+        self.started = 0
+        self.hits = 0
+        self.stale = 0
+        self.discarded = 0
+
+    def stats(self) -> PrefetchStats:
+        return PrefetchStats(
+            started=self.started,
+            hits=self.hits,
+            stale=self.stale,
+            discarded=self.discarded,
+        )
+
+
+prefetch_metrics = PrefetchMetrics()
+
+
+def prefetch_stats() -> PrefetchStats:
+    return prefetch_metrics.stats()
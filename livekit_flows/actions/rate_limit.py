@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator
+import asyncio
+import time
+
+from ..core import RateLimitConfig
+from .state import config_fingerprint, state_labels
+
+
+class RateLimitExceededError(Exception):
+    def __init__(self, key: str, reason: str):
+        super().__init__(f"Rate limit exceeded for {key}: {reason}")
+        self.key = key
+
+
+@dataclass(frozen=True)
+class RateLimiterStats:
+    acquired: int
+    rejected: int
+    queued: int
+    in_flight: int
+    total_wait: float
+    max_wait: float
+
+    @property
+    def mean_wait(self) -> float:
+        return self.total_wait / self.acquired if self.acquired else 0.0
+
+
+class RateLimiter:
+    """Token bucket plus concurrency limit shared by every session
+
+    Callers either wait for a token and a free slot, up to `max_wait`, or are
+    rejected straight away when the config says `on_limit: fail`.
+    """
+
+    def __init__(self, config: RateLimitConfig):
+        self.config = config
+        self._tokens = self.capacity
+        self._refilled_at = time.monotonic()
+        self._in_flight = 0
+        self._slots: asyncio.Semaphore | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._acquired = 0
+        self._rejected = 0
+        self._queued = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    @property
+    def capacity(self) -> float:
+        return float(self.config.burst or max(1, int(self.config.rate or 1)))
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if self.config.rate is not None:
+            elapsed = now - self._refilled_at
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.config.rate)
+        self._refilled_at = now
+
+    def _semaphore(self) -> asyncio.Semaphore | None:
+        if self.config.max_concurrency is None:
+            return None
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._loop is not loop:
+            self._slots = asyncio.Semaphore(self.config.max_concurrency)
+            self._loop = loop
+        return self._slots
+
+    def _reject(self, key: str, reason: str) -> RateLimitExceededError:
+        self._rejected += 1
+        return RateLimitExceededError(key, reason)
+
+    async def _take_token(self, key: str, give_up_at: float | None) -> None:
+        if self.config.rate is None:
+            return
+        while True:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+
+            wait = (1 - self._tokens) / self.config.rate
+            if self.config.on_limit == "fail":
+                raise self._reject(key, "no tokens left")
+            if give_up_at is not None and time.monotonic() + wait > give_up_at:
+                raise self._reject(key, "timed out waiting for a token")
+            await asyncio.sleep(wait)
+
+    async def _take_slot(
+        self, key: str, semaphore: asyncio.Semaphore, give_up_at: float | None
+    ) -> None:
+        if semaphore.locked():
+            if self.config.on_limit == "fail":
+                raise self._reject(key, "too many requests in flight")
+            timeout = None
+            if give_up_at is not None:
+                timeout = max(0.0, give_up_at - time.monotonic())
+            try:
+                await asyncio.wait_for(semaphore.acquire(), timeout)
+            except asyncio.TimeoutError:
+                raise self._reject(key, "timed out waiting for a free slot") from None
+        else:
+            await semaphore.acquire()
+
+    @asynccontextmanager
+    async def acquire(self, key: str) -> AsyncIterator[None]:
+        started = time.monotonic()
+        give_up_at = None
+        if self.config.max_wait is not None:
+            give_up_at = started + self.config.max_wait
+
+        semaphore = self._semaphore()
+        if semaphore is not None:
+            await self._take_slot(key, semaphore, give_up_at)
+        try:
+            await self._take_token(key, give_up_at)
+
+            waited = time.monotonic() - started
+            self._acquired += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+            if waited > 0.001:
+                self._queued += 1
+
+            self._in_flight += 1
+            try:
+                yield
+            finally:
+                self._in_flight -= 1
+        finally:
+            if semaphore is not None:
+                semaphore.release()
+
+    def stats(self) -> RateLimiterStats:
+        return RateLimiterStats(
+            acquired=self._acquired,
+            rejected=self._rejected,
+            queued=self._queued,
+            in_flight=self._in_flight,
+            total_wait=self._total_wait,
+            max_wait=self._max_wait,
+        )
+
+
+_rate_limiters: dict[tuple[str, str], RateLimiter] = {}
+
+
+def get_rate_limiter(key: str, config: RateLimitConfig) -> RateLimiter:
+    """Return the process-wide limiter for a host or action key and config
+
+    Callers sharing a key but declaring different limits, such as two actions
+    on one host or a reloaded flow, each get the limiter of their own config.
+    A limiter is never reset while requests may hold it.
+    """
+    state_key = (key, config_fingerprint(config))
+    limiter = _rate_limiters.get(state_key)
+    if limiter is None:
+        limiter = _rate_limiters[state_key] = RateLimiter(config)
+    return limiter
+
+
+def rate_limiter_stats() -> dict[str, RateLimiterStats]:
+    labels = state_labels(_rate_limiters)
+    return {labels[key]: limiter.stats() for key, limiter in _rate_limiters.items()}
+
+
+def clear_rate_limiters() -> None:
+    _rate_limiters.clear()
@@ -0,0 +1,79 @@
+from typing import Any
+import json
+
+import aiohttp
+
+_MISSING = object()
+
+
+class ResponseTooLargeError(Exception):
+    pass
+
+
+def _is_json_content_type(content_type: str) -> bool:
+    return content_type == "application/json" or content_type.endswith("+json")
+
+
+async def read_body(response: aiohttp.ClientResponse, max_bytes: int | None) -> bytes:
+    """Read the body, aborting as soon as it grows past max_bytes"""
+    if max_bytes is None:
+        return await response.read()
+
+    if response.content_length is not None and response.content_length > max_bytes:
+        raise ResponseTooLargeError(
+            f"Response of {response.content_length} bytes exceeds {max_bytes} bytes"
+        )
+
+    chunks = []
+    size = 0
+    async for chunk in response.content.iter_chunked(64 * 1024):
+        size += len(chunk)
+        if size > max_bytes:
+            raise ResponseTooLargeError(f"Response exceeds {max_bytes} bytes")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def decode_body(response: aiohttp.ClientResponse, body: bytes) -> Any:
+    text = body.decode(response.charset or "utf-8", errors="replace")
+    if _is_json_content_type(response.content_type):
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            pass
+    return text
+
+
+def extract_path(data: Any, path: str) -> Any:
+    """Resolve a dotted path such as `items.0.name` or `$.items[0].name`"""
+    path = path.removeprefix("$").removeprefix(".")
+    path = path.replace("[", ".").replace("]", "")
+
+    current = data
+    for part in filter(None, path.split(".")):
+        if isinstance(current, dict):
+            current = current.get(part, _MISSING)
+        elif isinstance(current, list) and part.lstrip("-").isdigit():
+            index = int(part)
+            current = (
+                current[index] if -len(current) <= index < len(current) else _MISSING
+            )
+        else:
+            current = _MISSING
+
+        if current is _MISSING:
+            return None
+    return current
+
+
+def project(data: Any, extract: dict[str, str]) -> dict[str, Any]:
+    return {name: extract_path(data, path) for name, path in extract.items()}
+
+
+def filter_headers(
+    headers: dict[str, str], allowed: list[str] | None
+) -> dict[str, str]:
+    if allowed is None:
+        return headers
+    selected = {name.lower() for name in allowed}
+    return {name: value for name, value in headers.items() if name.lower() in selected}
@@ -0,0 +1,38 @@
+from typing import Mapping, Sequence
+import asyncio
+
+from pydantic import BaseModel
+
+from .executor import ActionExecutor
+
+
+def schedule_actions(
+    executor: ActionExecutor,
+    action_ids: Sequence[str],
+    dependencies: Mapping[str, frozenset[str]],
+    userdata: BaseModel | None = None,
+    deadline: float | None = None,
+    max_concurrency: int | None = None,
+) -> dict[str, asyncio.Task]:
+    """Start actions as a DAG, each one as soon as its dependencies finished
+
+    Dependencies that fail still release their dependents, which then render
+    against the stored error result. Returns one task per action id.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+    tasks: dict[str, asyncio.Task] = {}
+
+    async def run(action_id: str):
+        upstream = [tasks[d] for d in dependencies.get(action_id, ()) if d in tasks]
+        if upstream:
+            await asyncio.wait(upstream)
+
+        if semaphore is None:
+            return await executor.execute_action(action_id, userdata, deadline)
+        async with semaphore:
+            return await executor.execute_action(action_id, userdata, deadline)
+
+    for action_id in dict.fromkeys(action_ids):
+        tasks[action_id] = asyncio.ensure_future(run(action_id))
+
+    return tasks
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+import asyncio
+
+
+@dataclass(frozen=True)
+class SingleFlightStats:
+    leaders: int
+    followers: int
+    in_flight: int
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls that share a key
+
+    The first caller starts the upstream call as a task and later callers with
+    the same key await that task. Cancelling one caller does not cancel the
+    shared call for the others.
+    """
+
+    def __init__(self):
+        self._calls: dict[str, asyncio.Task] = {}
+        self._leaders = 0
+        self._followers = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+            self._leaders += 1
+        else:
+            self._followers += 1
+
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved when every caller went away
+            task.exception()
+
+    def stats(self) -> SingleFlightStats:
+        return SingleFlightStats(
+            leaders=self._leaders,
+            followers=self._followers,
+            in_flight=len(self._calls),
+        )
+
+
+_shared_single_flight = SingleFlight()
+
+
+def get_single_flight() -> SingleFlight:
+    return _shared_single_flight
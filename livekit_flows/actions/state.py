@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from collections import Counter
+from typing import Iterable
+import hashlib
+
+from pydantic import BaseModel
+
+
+def config_fingerprint(config: BaseModel) -> str:
+    """Short stable id of a limit or breaker config"""
+    return hashlib.sha256(config.model_dump_json().encode("utf-8")).hexdigest()[:8]
+
+
+def state_labels(keys: Iterable[tuple[str, str]]) -> dict[tuple[str, str], str]:
+    """Stats label of each (key, fingerprint) pair
+
+    The fingerprint is only shown for keys used with several configs.
+    """
+    keys = list(keys)
+    configs = Counter(key for key, _ in keys)
+    return {
+        (key, fingerprint): key if configs[key] == 1 else f"{key}@{fingerprint}"
+        for key, fingerprint in keys
+    }
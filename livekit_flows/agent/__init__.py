@@ -1,9 +1,26 @@
 from .flow_agent import FlowAgent
-from .tools import ToolFactory
+from .tools import ToolFactory, get_tool_factory
 from .session import end_session
+from .context import (
+    NodeContextStats,
+    compact_chat_context,
+    estimate_tokens,
+    context_stats,
+    clear_context_stats,
+)
+from .prompt_layout import prompt_prefix, prompt_prefix_hash, dump_prompt_prefixes
 
 __all__ = [
     "FlowAgent",
     "ToolFactory",
+    "get_tool_factory",
     "end_session",
+    "NodeContextStats",
+    "compact_chat_context",
+    "estimate_tokens",
+    "context_stats",
+    "clear_context_stats",
+    "prompt_prefix",
+    "prompt_prefix_hash",
+    "dump_prompt_prefixes",
 ]
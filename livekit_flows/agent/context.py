@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+import json
+
+from livekit.agents import ChatContext
+from livekit.agents.llm import ChatItem, ChatMessage
+from pydantic import BaseModel
+
+from ..core import ContextPolicy
+
+# Rough average for English text with common LLM tokenizers, good enough to
+# compare nodes without depending on a model-specific tokenizer
+CHARS_PER_TOKEN = 4
+_KEPT_ROLES = ("system", "developer")
+
+
+@dataclass(frozen=True)
+class NodeContextStats:
+    transitions: int = 0
+    tokens_before: int = 0
+    tokens_after: int = 0
+    max_tokens: int = 0
+
+    @property
+    def mean_tokens(self) -> float:
+        return self.tokens_after / self.transitions if self.transitions else 0.0
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+
+def _item_text(item: ChatItem) -> str:
+    if item.type == "message":
+        return item.text_content or ""
+    if item.type == "function_call":
+        return item.name + item.arguments
+    if item.type == "function_call_output":
+        return item.output
+    return ""
+
+
+def estimate_tokens(chat_ctx: ChatContext) -> int:
+    chars = sum(len(_item_text(item)) for item in chat_ctx.items)
+    return chars // CHARS_PER_TOKEN
+
+
+def _userdata_summary(userdata: BaseModel | None) -> ChatMessage | None:
+    if userdata is None:
+        return None
+    values = {
+        key: value
+        for key, value in userdata.model_dump(mode="json").items()
+        if value is not None
+    }
+    if not values:
+        return None
+    return ChatMessage(
+        role="system",
+        content=[
+            "Information collected earlier in the conversation: "
+            + json.dumps(values, ensure_ascii=False)
+        ],
+    )
+
+
+def compact_chat_context(
+    chat_ctx: ChatContext,
+    policy: ContextPolicy,
+    userdata: BaseModel | None = None,
+) -> ChatContext:
+    """Copy of the chat context reduced according to a node's policy
+
+    System messages of dropped turns are kept. With `summarize_userdata`, the
+    dropped turns are replaced by one message listing the collected userdata.
+    """
+    items = chat_ctx.copy(exclude_function_call=policy.drop_tool_calls).items
+    kept: list[ChatItem] = items
+    dropped: list[ChatItem] = []
+
+    if policy.fresh:
+        kept, dropped = [], items
+    elif policy.max_turns is not None:
+        user_turns = [
+            i
+            for i, item in enumerate(items)
+            if item.type == "message" and item.role == "user"
+        ]
+        if len(user_turns) > policy.max_turns:
+            cut = user_turns[-policy.max_turns]
+            kept, dropped = items[cut:], items[:cut]
+
+    if not dropped:
+        return ChatContext(kept)
+
+    prefix = [
+        item
+        for item in dropped
+        if item.type == "message" and item.role in _KEPT_ROLES and not policy.fresh
+    ]
+    if policy.summarize_userdata:
+        summary = _userdata_summary(userdata)
+        if summary is not None:
+            prefix.append(summary)
+    return ChatContext(prefix + kept)
+
+
+_context_stats: dict[str, NodeContextStats] = {}
+
+
+def record_context_size(
+    namespace: str, node_id: str, tokens_before: int, tokens_after: int
+) -> None:
+    key = f"{namespace}/{node_id}"
+    stats = _context_stats.get(key, NodeContextStats())
+    _context_stats[key] = replace(
+        stats,
+        transitions=stats.transitions + 1,
+        tokens_before=stats.tokens_before + tokens_before,
+        tokens_after=stats.tokens_after + tokens_after,
+        max_tokens=max(stats.max_tokens, tokens_after),
+    )
+
+
+def context_stats() -> dict[str, NodeContextStats]:
+    """Estimated prompt tokens carried into each node, keyed `<namespace>/<node_id>`
+
+    The namespace is the compiled flow's, so flows sharing node ids are
+    reported apart.
+    """
+    return dict(_context_stats)
+
+
+def clear_context_stats() -> None:
+    _context_stats.clear()
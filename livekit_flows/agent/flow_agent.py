@@ -3,12 +3,23 @@ from livekit.agents.voice import SpeechHandle
 import asyncio
 import logging
 
-from ..core import ConversationFlow, FlowNode, ActionTriggerType
-from ..actions import ActionExecutor
-from ..utils import generate_userdata_class, validate_against_schema
-from .tools import ToolFactory
-from .session import end_session
+from pydantic import BaseModel
+
+from ..core import (
+    ConversationFlow,
+    FlowNode,
+    ActionTrigger,
+    ActionTriggerType,
+    ContextPolicy,
+)
+from ..actions import ActionExecutor, schedule_actions
+from ..compiler import CompiledFlow, CompiledNode, compile_flow
 from ..templates import TemplateRenderer
+from ..utils import validate_against_schema
+from .context import compact_chat_context, estimate_tokens, record_context_size
+from .prompt_layout import prompt_prefix_hash
+from .tools import get_tool_factory
+from .session import end_session
 
 logger = logging.getLogger(__name__)
 
@@ -16,97 +27,143 @@ logger = logging.getLogger(__name__)
 class FlowAgent(Agent):
     def __init__(
         self,
-        flow: ConversationFlow,
+        flow: ConversationFlow | CompiledFlow,
         current_node: FlowNode | None = None,
         chat_ctx: ChatContext | None = None,
         action_executor: ActionExecutor | None = None,
     ):
-        self._flow = flow
-        self._current_node = self._get_initial_node(current_node)
-        self._userdata_class = generate_userdata_class(flow)
+        self._compiled_flow = compile_flow(flow)
+        self._compiled_node = self._get_initial_node(current_node)
 
         self._action_executor = action_executor or ActionExecutor(
-            actions=flow.actions, environment_vars=flow.environment_variables
+            actions=self._compiled_flow.actions,
+            environment_vars=self._flow.environment_variables,
+            template_renderer=self._compiled_flow.renderer,
+            namespace=self._compiled_flow.namespace,
         )
-        self._template_renderer = TemplateRenderer()
 
-        async def handle_transition(target_node_id: str, edge_id: str | None):
-            await self._transition_to_node(target_node_id, edge_id)
+        super().__init__(
+            instructions=self._flow.system_prompt,
+            tools=get_tool_factory().tools_for_node(self._compiled_node),
+            chat_ctx=chat_ctx,
+        )
 
-        async def handle_data_collection(
-            collected_data: dict, target_node_id: str | None, edge_id: str | None
-        ):
-            edge = None
-            for e in self._current_node.edges:
-                if e.id == edge_id:
-                    edge = e
-                    break
-
-            if edge and edge.input_schema:
-                is_valid, error_msg = validate_against_schema(
-                    collected_data, edge.input_schema
+    # Derived from the shared compiled flow rather than stored per agent
+
+    @property
+    def _flow(self) -> ConversationFlow:
+        return self._compiled_flow.flow
+
+    @property
+    def _current_node(self) -> FlowNode:
+        return self._compiled_node.node
+
+    @property
+    def _userdata_class(self) -> type[BaseModel]:
+        return self._compiled_flow.userdata_class
+
+    @property
+    def _template_renderer(self) -> TemplateRenderer:
+        return self._compiled_flow.renderer
+
+    async def handle_transition(
+        self, target_node_id: str, edge_id: str | None
+    ) -> Agent | None:
+        if self._is_stale_edge(edge_id):
+            return None
+        return await self._transition_to_node(target_node_id, edge_id)
+
+    async def handle_data_collection(
+        self, collected_data: dict, target_node_id: str | None, edge_id: str | None
+    ) -> Agent | None:
+        if self._is_stale_edge(edge_id):
+            return None
+        compiled_edge = self._compiled_node.get_edge(edge_id)
+        edge = compiled_edge.edge if compiled_edge else None
+
+        if compiled_edge and edge and edge.input_schema:
+            is_valid, error_msg = validate_against_schema(
+                collected_data, edge.input_schema, compiled_edge.validator
+            )
+            if not is_valid:
+                logger.warning(
+                    f"Data collection validation failed for edge {edge_id}: {error_msg}"
                 )
-                if not is_valid:
-                    logger.warning(
-                        f"Data collection validation failed for edge {edge_id}: {error_msg}"
-                    )
-                    # Continue despite validation error (non-blocking)
-
-            if not hasattr(self.session, "userdata") or self.session.userdata is None:
-                self.session.userdata = self._userdata_class.model_construct()
-
-            for key, value in collected_data.items():
-                setattr(self.session.userdata, key, value)
-
-            if target_node_id:
-                await self._transition_to_node(target_node_id, edge_id)
-
-        def get_edge_description(edge_id: str) -> str:
-            for edge in self._current_node.edges:
-                if edge.id == edge_id:
-                    if edge.target_node_id:
-                        return f"Transition to {edge.target_node_id} when {edge.condition.lower()}"
-                    else:
-                        return edge.condition or f"Transition via {edge_id}"
-            return f"Transition via {edge_id}"
-
-        self._tool_factory = ToolFactory(
-            handle_transition, handle_data_collection, get_edge_description
-        )
-        tools = self._tool_factory.build_tools_for_node(self._current_node)
+                # Continue despite validation error (non-blocking)
 
-        super().__init__(
-            instructions=flow.system_prompt,
-            tools=tools,
-            chat_ctx=chat_ctx,
+        if not hasattr(self.session, "userdata") or self.session.userdata is None:
+            self.session.userdata = self._userdata_class.model_construct()
+
+        self._action_executor.template_context.update_userdata(
+            self.session.userdata, collected_data
         )
 
-    def _get_initial_node(self, current_node: FlowNode | None) -> FlowNode:
+        if target_node_id:
+            return await self._transition_to_node(target_node_id, edge_id)
+        return None
+
+    def _get_initial_node(self, current_node: FlowNode | None) -> CompiledNode:
         if current_node is not None:
-            return current_node
+            return self._compiled_flow.node_for(current_node)
 
-        initial_node_id = self._flow.initial_node
-        initial_node = next(
-            (node for node in self._flow.nodes if node.id == initial_node_id), None
-        )
+        return self._compiled_flow.initial_node
 
-        if not initial_node:
-            raise ValueError(f"Initial node {initial_node_id} not found in flow")
+    def _is_stale_edge(self, edge_id: str | None) -> bool:
+        """Whether a tool call names an edge the current node does not have
 
-        return initial_node
+        Tools are shared and dispatch to the session's active agent, so a call
+        issued in an earlier node can arrive after the agent has moved on.
+        """
+        if edge_id is None or self._compiled_node.get_edge(edge_id) is not None:
+            return False
+        logger.warning(
+            f"Ignoring tool call for edge {edge_id}, "
+            f"not an edge of node {self._compiled_node.id}"
+        )
+        return True
 
     def _get_edge_condition(self, edge_id: str) -> str:
-        for edge in self._current_node.edges:
-            if edge.id == edge_id:
-                return edge.condition
+        compiled_edge = self._compiled_node.get_edge(edge_id)
+        if compiled_edge:
+            return compiled_edge.edge.condition
         return f"Edge {edge_id}"
 
-    async def _execute_node_actions(self, trigger_type: ActionTriggerType):
-        actions_to_execute = [
-            action
-            for action in self._current_node.actions
-            if action.trigger_type == trigger_type
-        ]
+    def _split_actions(
+        self, triggers: tuple[ActionTrigger, ...]
+    ) -> tuple[list[ActionTrigger], list[ActionTrigger]]:
+        """Split actions into those to await and those to run in the background
+
+        Non-blocking actions are still awaited when the node's templates read
+        their stored result.
+        """
+        referenced = self._compiled_node.referenced_action_results
+        awaited, background = [], []
+
+        for trigger in triggers:
+            action = self._compiled_flow.actions.get(trigger.action_id)
+            if (
+                action is None
+                or action.blocking
+                or referenced is None
+                or action.store_response_as in referenced
+            ):
+                awaited.append(trigger)
+            else:
+                background.append(trigger)
+
+        return awaited, background
+
+    def _action_deadline(self) -> float | None:
+        if self._current_node.action_deadline is not None:
+            return self._current_node.action_deadline
+        return self._flow.settings.action_deadline
+
+    async def _execute_node_actions(
+        self,
+        trigger_type: ActionTriggerType,
+        deadline: float | None = None,
+    ):
+        actions_to_execute = self._compiled_node.actions_for(trigger_type)
 
         if not actions_to_execute:
             return
@@ -115,50 +172,147 @@ class FlowAgent(Agent):
             f"Executing {len(actions_to_execute)} node actions for trigger {trigger_type}"
         )
 
-        tasks = []
-        for action in actions_to_execute:
-            task = self._action_executor.execute_action(
-                action.action_id, self.session.userdata
-            )
-            tasks.append(task)
+        userdata = self._get_userdata()
+        awaited, _ = self._split_actions(actions_to_execute)
 
-        if tasks:
-            try:
-                await asyncio.gather(*tasks, return_exceptions=True)
-            except Exception as e:
-                logger.error(f"Error executing node actions: {e}")
+        deadline_at = None
+        if deadline is not None:
+            deadline_at = asyncio.get_running_loop().time() + deadline
 
-    def _render_instruction(self, instruction: str) -> str:
+        tasks = schedule_actions(
+            self._action_executor,
+            [action.action_id for action in actions_to_execute],
+            self._compiled_node.dependencies_for(trigger_type),
+            userdata,
+            deadline_at,
+            self._flow.settings.max_concurrent_actions,
+        )
+        awaited_ids = {action.action_id for action in awaited}
+        for action_id, task in tasks.items():
+            if action_id not in awaited_ids:
+                self._action_executor.track_task(task)
+
+        awaited_tasks = [tasks[action_id] for action_id in awaited_ids]
+        if awaited_tasks:
+            # Awaiting an action also waits for the background actions it reads
+            _, pending = await asyncio.wait(awaited_tasks, timeout=deadline)
+            if pending:
+                logger.warning(
+                    f"{len(pending)} node actions missed the {deadline}s deadline "
+                    f"on {self._current_node.id}, continuing without them"
+                )
+                for task in pending:
+                    self._action_executor.track_task(task)
+
+    def _get_userdata(self):
         try:
-            userdata = self.session.userdata
+            return self.session.userdata
         except ValueError:
             self.session.userdata = self._userdata_class.model_construct()
-            userdata = self.session.userdata
+            return self.session.userdata
+
+    def _prefetch_next_nodes(self):
+        userdata = self._get_userdata()
+        for edge in self._compiled_node.edges.values():
+            if not edge.target_node_id:
+                continue
+            target_node = self._compiled_flow.get_node(edge.target_node_id)
+            if target_node is None:
+                continue
+            for action in target_node.on_enter_actions:
+                self._action_executor.prefetch_action(action.action_id, userdata)
 
-        return self._template_renderer.render_with_data(
+    def _render_instruction(self, instruction: str) -> str:
+        return self._template_renderer.render_in(
             instruction,
-            userdata=userdata,
-            environment_vars=self._flow.environment_variables,
-            action_results=self._action_executor.action_results,
+            self._action_executor.template_context,
+            self._get_userdata(),
+        )
+
+    def _context_policy(self, target_node: CompiledNode) -> ContextPolicy | None:
+        if target_node.node.context_policy is not None:
+            return target_node.node.context_policy
+        return self._flow.settings.context_policy
+
+    def _compact_chat_ctx(
+        self, target_node: CompiledNode
+    ) -> tuple[ChatContext, ContextPolicy | None]:
+        chat_ctx = self.chat_ctx
+        policy = self._context_policy(target_node)
+        tokens_before = estimate_tokens(chat_ctx)
+        if policy is not None:
+            userdata = self._get_userdata() if policy.summarize_userdata else None
+            chat_ctx = compact_chat_context(chat_ctx, policy, userdata)
+        record_context_size(
+            self._compiled_flow.namespace,
+            target_node.id,
+            tokens_before,
+            estimate_tokens(chat_ctx),
         )
+        return chat_ctx, policy
 
     async def _transition_to_node(
         self, target_node_id: str, edge_id: str | None = None
-    ):
-        target_node = next(
-            (node for node in self._flow.nodes if node.id == target_node_id), None
-        )
+    ) -> Agent | None:
+        target_node = self._compiled_flow.get_node(target_node_id)
         if not target_node:
             raise ValueError(f"Target node {target_node_id} not found in flow")
 
+        chat_ctx, policy = self._compact_chat_ctx(target_node)
+
+        if self._flow.settings.transition_mode == "in_place":
+            await self._switch_node(
+                target_node, chat_ctx if policy is not None else None
+            )
+            return None
+
         new_agent = FlowAgent(
-            self._flow, target_node, self.chat_ctx, self._action_executor
+            self._compiled_flow, target_node.node, chat_ctx, self._action_executor
         )
+        if self._flow.settings.tool_handoff:
+            # Returned through the tool so the framework switches in the same turn
+            return new_agent
         self.session.update_agent(new_agent)
+        return None
+
+    async def _switch_node(
+        self, target_node: CompiledNode, chat_ctx: ChatContext | None = None
+    ):
+        """Move this agent to another node without an agent handoff
+
+        Runs the same exit and entry steps as a handoff, but keeps the
+        activity and only swaps the tool list, and the chat context when the
+        target node compacts it.
+        """
+        await self.on_exit()
+        self._compiled_node = target_node
+        await self.update_tools(get_tool_factory().tools_for_node(target_node))
+        if chat_ctx is not None:
+            await self.update_chat_ctx(chat_ctx)
+        await self.on_enter()
 
     async def on_enter(self):
-        async with self._action_executor:
-            await self._execute_node_actions(ActionTriggerType.ON_ENTER)
+        if logger.isEnabledFor(logging.DEBUG):
+            prefix_hash = prompt_prefix_hash(
+                self._compiled_flow, self._compiled_node.id
+            )
+            logger.debug(
+                f"Entering node {self._compiled_node.id}, prompt prefix {prefix_hash[:16]}"
+            )
+
+        if (
+            self._current_node.filler_text
+            and self._split_actions(self._compiled_node.on_enter_actions)[0]
+        ):
+            self.session.say(self._render_instruction(self._current_node.filler_text))
+
+        await self._execute_node_actions(
+            ActionTriggerType.ON_ENTER, deadline=self._action_deadline()
+        )
+        # Background and dependency-gated actions may not have claimed theirs yet
+        self._action_executor.discard_prefetches(
+            keep={a.action_id for a in self._compiled_node.on_enter_actions}
+        )
 
         speech_handle: SpeechHandle | None = None
 
@@ -175,6 +329,8 @@ class FlowAgent(Agent):
 
         if self._current_node.is_final:
             await end_session(speech_handle)
+        elif self._flow.settings.prefetch_actions:
+            self._prefetch_next_nodes()
 
     async def on_exit(self):
         await self._execute_node_actions(ActionTriggerType.ON_EXIT)
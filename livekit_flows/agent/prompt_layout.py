@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Union
+import hashlib
+import json
+
+from livekit.agents import llm
+from livekit.agents.llm.utils import build_legacy_openai_schema
+
+from ..core import ConversationFlow
+from ..compiler import CompiledFlow, compile_flow
+from .tools import get_tool_factory
+
+
+def _tool_schema(tool: llm.Tool) -> dict[str, Any]:
+    if isinstance(tool, llm.RawFunctionTool):
+        return tool.info.raw_schema
+    if isinstance(tool, llm.FunctionTool):
+        return build_legacy_openai_schema(tool)
+    return {"type": type(tool).__name__}
+
+
+def prompt_prefix(flow: ConversationFlow | CompiledFlow, node_id: str) -> bytes:
+    """Bytes of the prompt part that stays the same for every turn in a node
+
+    The system prompt followed by the node's tool schemas, in the order they
+    are sent. Two nodes or flow versions share the provider's prompt cache as
+    far as their prefixes are equal. Rendered node instructions are sent after
+    the conversation and are not part of it.
+    """
+    compiled = compile_flow(flow)
+    node = compiled.get_node(node_id)
+    if node is None:
+        raise KeyError(f"Node {node_id} not found in flow")
+
+    tools = get_tool_factory().tools_for_node(node)
+    prefix = {
+        "instructions": compiled.flow.system_prompt,
+        "tools": [_tool_schema(tool) for tool in tools],
+    }
+    return json.dumps(prefix, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def prompt_prefix_hash(flow: ConversationFlow | CompiledFlow, node_id: str) -> str:
+    return hashlib.sha256(prompt_prefix(flow, node_id)).hexdigest()
+
+
+def dump_prompt_prefixes(
+    flow: ConversationFlow | CompiledFlow, directory: Union[str, Path]
+) -> dict[str, str]:
+    """Write each node's prompt prefix to `<node_id>.json`, returning their hashes
+
+    Comparing dumps across flow versions or layouts shows which nodes can
+    reuse cached prompts without running a session.
+    """
+    compiled = compile_flow(flow)
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    hashes = {}
+    for node_id in compiled.nodes:
+        prefix = prompt_prefix(compiled, node_id)
+        (directory / f"{node_id}.json").write_bytes(prefix)
+        hashes[node_id] = hashlib.sha256(prefix).hexdigest()
+    return hashes
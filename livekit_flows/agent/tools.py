@@ -1,56 +1,105 @@
 from __future__ import annotations
 
-from livekit.agents import function_tool, RunContext
-from ..core import Edge, FlowNode
+from typing import TYPE_CHECKING, Protocol
+from weakref import WeakKeyDictionary
+
+from livekit.agents import function_tool, RunContext, llm
+from ..compiler import CompiledEdge, CompiledNode
+
+if TYPE_CHECKING:
+    from livekit.agents import Agent, AgentSession
+
+
+class FlowToolHandler(Protocol):
+    """Handles flow tool calls, returning the agent to hand off to, if any"""
+
+    async def handle_transition(
+        self, target_node_id: str, edge_id: str | None
+    ) -> Agent | None: ...
+
+    async def handle_data_collection(
+        self, collected_data: dict, target_node_id: str | None, edge_id: str | None
+    ) -> Agent | None: ...
+
+
+def _resolve_handler(session: AgentSession) -> FlowToolHandler:
+    agent = session.current_agent
+    if not hasattr(agent, "handle_transition"):
+        raise RuntimeError(
+            f"Flow tool called while {type(agent).__name__} is the active agent"
+        )
+    return agent  # type: ignore[return-value]
 
 
 class ToolFactory:
-    def __init__(self, on_transition, on_collect_data, get_description=None):
-        self._on_transition = on_transition
-        self._on_collect_data = on_collect_data
-        self._get_description = get_description or (
-            lambda edge_id: f"Transition via {edge_id}"
+    """Builds the function tools of flow nodes
+
+    Tools carry no session state: the handler is resolved from the RunContext
+    when a tool is called, so one tool list per compiled node is shared by
+    every session running the flow.
+    """
+
+    def __init__(self):
+        self._node_tools: WeakKeyDictionary[CompiledNode, tuple[llm.Tool, ...]] = (
+            WeakKeyDictionary()
         )
 
-    def build_data_collection_tool(self, edge: Edge):
+    def build_data_collection_tool(self, edge: CompiledEdge):
         """Build a tool from JSON Schema"""
-        if not edge.input_schema:
+        if not edge.tool_schema:
             raise ValueError(f"Edge {edge.id} has no input_schema defined")
 
-        # Build the raw schema for the function tool
-        raw_schema = {
-            "type": "function",
-            "name": edge.id,
-            "description": edge.condition,
-            "parameters": edge.input_schema,
-        }
+        target_node_id = edge.target_node_id
+        edge_id = edge.id
 
         async def data_collection_func(
             raw_arguments: dict[str, object], context: RunContext
         ):
             # Collect all data from the arguments
             collected_data = dict(raw_arguments)
-            await self._on_collect_data(collected_data, edge.target_node_id, edge.id)
+            handler = _resolve_handler(context.session)
+            return await handler.handle_data_collection(
+                collected_data, target_node_id, edge_id
+            )
 
-        return function_tool(data_collection_func, raw_schema=raw_schema)
+        return function_tool(data_collection_func, raw_schema=dict(edge.tool_schema))
+
+    def build_transition_tool(self, edge: CompiledEdge):
+        target_node_id = edge.target_node_id
+        edge_id = edge.id
 
-    def build_transition_tool(self, edge_id: str, target_node_id: str):
         async def transition_func(context: RunContext):
-            await self._on_transition(target_node_id, edge_id)
+            handler = _resolve_handler(context.session)
+            return await handler.handle_transition(target_node_id, edge_id)
 
         return function_tool(
             transition_func,
             name=edge_id,
-            description=self._get_description(edge_id),
+            description=edge.description,
         )
 
-    def build_tools_for_node(self, node: FlowNode):
+    def build_tools_for_node(self, node: CompiledNode) -> list[llm.Tool]:
         tools = []
 
-        for edge in node.edges:
-            if edge.input_schema:
+        for edge in node.edges.values():
+            if edge.tool_schema:
                 tools.append(self.build_data_collection_tool(edge))
             else:
-                tools.append(self.build_transition_tool(edge.id, edge.target_node_id))
+                tools.append(self.build_transition_tool(edge))
 
         return tools
+
+    def tools_for_node(self, node: CompiledNode) -> list[llm.Tool]:
+        """Return the node's tools, building them on first use"""
+        tools = self._node_tools.get(node)
+        if tools is None:
+            tools = tuple(self.build_tools_for_node(node))
+            self._node_tools[node] = tools
+        return list(tools)
+
+
+_shared_tool_factory = ToolFactory()
+
+
+def get_tool_factory() -> ToolFactory:
+    return _shared_tool_factory
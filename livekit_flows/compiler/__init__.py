@@ -0,0 +1,35 @@
+from .compiled_flow import (
+    CompiledFlow,
+    CompiledNode,
+    CompiledEdge,
+    compile_flow,
+    discard_compiled_flow,
+    canonicalize_schema,
+)
+from .dependencies import infer_action_dependencies
+from .source import FlowDiff, FlowSource, diff_flows
+from .registry import (
+    FlowRegistry,
+    FlowRegistryStats,
+    FlowCacheStats,
+    estimate_size,
+    intern_strings,
+)
+
+__all__ = [
+    "CompiledFlow",
+    "CompiledNode",
+    "CompiledEdge",
+    "compile_flow",
+    "discard_compiled_flow",
+    "canonicalize_schema",
+    "infer_action_dependencies",
+    "FlowDiff",
+    "FlowSource",
+    "diff_flows",
+    "FlowRegistry",
+    "FlowRegistryStats",
+    "FlowCacheStats",
+    "estimate_size",
+    "intern_strings",
+]
@@ -0,0 +1,323 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Mapping
+import itertools
+import logging
+import re
+
+from pydantic import BaseModel
+
+from ..core import (
+    ActionTrigger,
+    ActionTriggerType,
+    ConversationFlow,
+    CustomAction,
+    Edge,
+    FlowNode,
+)
+from ..templates import (
+    TemplateRenderer,
+    iter_flow_templates,
+    referenced_action_results,
+    template_dependencies,
+)
+from .dependencies import infer_action_dependencies
+from ..utils import SchemaValidator, compile_validator, generate_userdata_class
+
+logger = logging.getLogger(__name__)
+
+_flow_numbers = itertools.count(1)
+
+_WHITESPACE = re.compile(r"\s+")
+_TEXT_KEYS = frozenset({"description", "title"})
+
+
+def normalize_whitespace(text: str) -> str:
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def canonicalize_schema(value: Any) -> Any:
+    """Copy of a JSON schema with sorted keys and normalised descriptions
+
+    Schemas that differ only in key order or description whitespace become
+    equal, so they serialise to the same bytes.
+    """
+    if isinstance(value, Mapping):
+        return {
+            key: (
+                normalize_whitespace(item)
+                if key in _TEXT_KEYS and isinstance(item, str)
+                else canonicalize_schema(item)
+            )
+            for key, item in sorted(value.items())
+        }
+    if isinstance(value, list):
+        return [canonicalize_schema(item) for item in value]
+    return value
+
+
+def _edge_description(edge: Edge) -> str:
+    if edge.target_node_id:
+        return f"Transition to {edge.target_node_id} when {edge.condition.lower()}"
+    return edge.condition or f"Transition via {edge.id}"
+
+
+def _tool_schema(edge: Edge) -> dict[str, Any] | None:
+    if not edge.input_schema:
+        return None
+
+    return {
+        "type": "function",
+        "name": edge.id,
+        "description": edge.condition,
+        "parameters": edge.input_schema,
+    }
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class CompiledEdge:
+    edge: Edge
+    description: str
+    tool_schema: Mapping[str, Any] | None
+    validator: SchemaValidator | None
+
+    @property
+    def id(self) -> str:
+        return self.edge.id
+
+    @property
+    def target_node_id(self) -> str | None:
+        return self.edge.target_node_id
+
+    @classmethod
+    def compile(cls, edge: Edge, canonical: bool = False) -> CompiledEdge:
+        validator = None
+        if isinstance(edge.input_schema, dict):
+            validator = compile_validator(edge.input_schema)
+
+        description = _edge_description(edge)
+        tool_schema = _tool_schema(edge)
+        if canonical:
+            description = normalize_whitespace(description)
+            if tool_schema is not None:
+                tool_schema = canonicalize_schema(tool_schema)
+
+        return cls(
+            edge=edge,
+            description=description,
+            tool_schema=MappingProxyType(tool_schema) if tool_schema else None,
+            validator=validator,
+        )
+
+
+@dataclass(frozen=True, slots=True, eq=False, weakref_slot=True)
+class CompiledNode:
+    node: FlowNode
+    edges: Mapping[str, CompiledEdge]
+    on_enter_actions: tuple[ActionTrigger, ...]
+    on_exit_actions: tuple[ActionTrigger, ...]
+    # Action results the node's spoken templates read, None if not bounded
+    referenced_action_results: frozenset[str] | None
+    on_enter_dependencies: Mapping[str, frozenset[str]]
+    on_exit_dependencies: Mapping[str, frozenset[str]]
+
+    @property
+    def id(self) -> str:
+        return self.node.id
+
+    def get_edge(self, edge_id: str | None) -> CompiledEdge | None:
+        if edge_id is None:
+            return None
+        return self.edges.get(edge_id)
+
+    def actions_for(self, trigger_type: ActionTriggerType) -> tuple[ActionTrigger, ...]:
+        if trigger_type == ActionTriggerType.ON_ENTER:
+            return self.on_enter_actions
+        return self.on_exit_actions
+
+    def dependencies_for(
+        self, trigger_type: ActionTriggerType
+    ) -> Mapping[str, frozenset[str]]:
+        if trigger_type == ActionTriggerType.ON_ENTER:
+            return self.on_enter_dependencies
+        return self.on_exit_dependencies
+
+    @classmethod
+    def compile(
+        cls,
+        node: FlowNode,
+        actions: Mapping[str, CustomAction],
+        canonical_tools: bool = False,
+    ) -> CompiledNode:
+        """Compile a node, optionally with a byte-stable tool list
+
+        With `canonical_tools` edges are sorted by id and their tool schemas
+        canonicalised, so the tools do not depend on how the flow was written.
+        """
+        edges: dict[str, CompiledEdge] = {}
+        for edge in node.edges:
+            # Keep the first edge on duplicate ids, matching the previous linear scan
+            if edge.id not in edges:
+                edges[edge.id] = CompiledEdge.compile(edge, canonical_tools)
+        if canonical_tools:
+            edges = dict(sorted(edges.items()))
+
+        on_enter_actions = tuple(
+            a for a in node.actions if a.trigger_type == ActionTriggerType.ON_ENTER
+        )
+        on_exit_actions = tuple(
+            a for a in node.actions if a.trigger_type == ActionTriggerType.ON_EXIT
+        )
+
+        try:
+            on_enter_dependencies = infer_action_dependencies(on_enter_actions, actions)
+            on_exit_dependencies = infer_action_dependencies(on_exit_actions, actions)
+        except ValueError as e:
+            raise ValueError(f"Node {node.id}: {e}") from e
+
+        return cls(
+            node=node,
+            edges=MappingProxyType(edges),
+            on_enter_actions=on_enter_actions,
+            on_exit_actions=on_exit_actions,
+            referenced_action_results=referenced_action_results(
+                node.instruction, node.static_text
+            ),
+            on_enter_dependencies=on_enter_dependencies,
+            on_exit_dependencies=on_exit_dependencies,
+        )
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class CompiledFlow:
+    """Indexed, precomputed runtime form of a ConversationFlow
+
+    A compiled flow is a snapshot of the flow definition at compile time and is
+    shared by every FlowAgent running that flow in the process.
+    """
+
+    flow: ConversationFlow
+    nodes: Mapping[str, CompiledNode]
+    actions: Mapping[str, CustomAction]
+    initial_node: CompiledNode
+    userdata_class: type[BaseModel]
+    renderer: TemplateRenderer
+    # Prefix of the process-wide action state (latency, caches, limits), so
+    # flows with equal action ids keep theirs apart
+    namespace: str
+
+    def get_node(self, node_id: str) -> CompiledNode | None:
+        return self.nodes.get(node_id)
+
+    def node_for(self, node: FlowNode) -> CompiledNode:
+        compiled = self.nodes.get(node.id)
+        if compiled is None or (compiled.node is not node and compiled.node != node):
+            # Node objects built outside the flow are compiled on the fly
+            return CompiledNode.compile(
+                node, self.actions, self.flow.settings.prompt_layout == "cache_friendly"
+            )
+        return compiled
+
+    @classmethod
+    def compile(
+        cls,
+        flow: ConversationFlow,
+        previous: CompiledFlow | None = None,
+        namespace: str | None = None,
+    ) -> CompiledFlow:
+        """Compile a flow, reusing the unchanged nodes of a previous version
+
+        A new version keeps the previous version's namespace unless one is given.
+        """
+        if namespace is None:
+            namespace = (
+                previous.namespace
+                if previous is not None
+                else f"flow{next(_flow_numbers)}"
+            )
+        actions = {action.id: action for action in flow.actions}
+        canonical_tools = flow.settings.prompt_layout == "cache_friendly"
+        if (
+            previous is not None
+            and previous.flow.settings.prompt_layout != flow.settings.prompt_layout
+        ):
+            # Tool schemas depend on the layout, no node can be reused
+            previous = None
+        nodes: dict[str, CompiledNode] = {}
+        reused = 0
+        for node in flow.nodes:
+            if node.id in nodes:
+                continue
+            compiled_node = None
+            if previous is not None:
+                compiled_node = previous._reusable_node(node, actions)
+            if compiled_node is None:
+                compiled_node = CompiledNode.compile(node, actions, canonical_tools)
+            else:
+                reused += 1
+            nodes[node.id] = compiled_node
+
+        if previous is not None:
+            logger.debug(
+                f"Recompiled {len(nodes) - reused} of {len(nodes)} nodes, "
+                f"reused {reused}"
+            )
+
+        initial_node = nodes.get(flow.initial_node)
+        if initial_node is None:
+            raise ValueError(f"Initial node {flow.initial_node} not found in flow")
+
+        renderer = TemplateRenderer()
+        renderer.precompile_flow(flow)
+        for source in iter_flow_templates(flow):
+            template_dependencies(source)
+
+        return cls(
+            flow=flow,
+            nodes=MappingProxyType(nodes),
+            actions=MappingProxyType(actions),
+            initial_node=initial_node,
+            userdata_class=generate_userdata_class(flow),
+            renderer=renderer,
+            namespace=namespace,
+        )
+
+    def _reusable_node(
+        self, node: FlowNode, actions: Mapping[str, CustomAction]
+    ) -> CompiledNode | None:
+        compiled = self.nodes.get(node.id)
+        if compiled is None or compiled.node != node:
+            return None
+        # Action dependencies are inferred from the action definitions
+        for trigger in node.actions:
+            if self.actions.get(trigger.action_id) != actions.get(trigger.action_id):
+                return None
+        return compiled
+
+
+def compile_flow(flow: ConversationFlow | CompiledFlow) -> CompiledFlow:
+    """Return the compiled form of a flow, compiling it on first use
+
+    The compiled form is stored on the flow, so every agent running the flow
+    shares it and it is freed with the flow. Assigning a flow field drops it,
+    call `discard_compiled_flow` after changing nested values in place.
+    """
+    if isinstance(flow, CompiledFlow):
+        return flow
+
+    compiled = flow._compiled
+    # A copied flow carries its source's compiled form
+    if compiled is not None and compiled.flow is flow:
+        return compiled
+
+    compiled = CompiledFlow.compile(flow)
+    flow._compiled = compiled
+    logger.debug(f"Compiled flow with {len(compiled.nodes)} nodes")
+    return compiled
+
+
+def discard_compiled_flow(flow: ConversationFlow) -> None:
+    """Drop the cached compiled form, the next compile_flow call recompiles it"""
+    flow._compiled = None
@@ -0,0 +1,75 @@
+from types import MappingProxyType
+from typing import Mapping, Sequence
+
+from ..core import ActionTrigger, CustomAction
+from ..templates import referenced_keys
+
+
+def _action_templates(action: CustomAction) -> list[str]:
+    templates = [action.url, *action.headers.values()]
+    if action.body_template:
+        templates.append(action.body_template)
+    return templates
+
+
+def infer_action_dependencies(
+    triggers: Sequence[ActionTrigger],
+    actions: Mapping[str, CustomAction],
+) -> Mapping[str, frozenset[str]]:
+    """Map each action id to the ids of actions whose results its templates read
+
+    Only actions fired by the same trigger are considered. An action that reads
+    `actions` as a whole depends on every action declared before it.
+    """
+    action_ids = list(dict.fromkeys(t.action_id for t in triggers))
+    producers: dict[str, list[str]] = {}
+    for action_id in action_ids:
+        action = actions.get(action_id)
+        if action is not None and action.store_response_as:
+            producers.setdefault(action.store_response_as, []).append(action_id)
+
+    dependencies: dict[str, frozenset[str]] = {}
+    for position, action_id in enumerate(action_ids):
+        action = actions.get(action_id)
+        if action is None:
+            dependencies[action_id] = frozenset()
+            continue
+
+        depends_on: set[str] = set()
+        for template in _action_templates(action):
+            keys = referenced_keys(template, "actions")
+            if keys is None:
+                depends_on.update(
+                    a
+                    for a in action_ids[:position]
+                    if actions.get(a) and actions[a].store_response_as
+                )
+                continue
+            for key in keys:
+                depends_on.update(producers.get(key, ()))
+
+        depends_on.discard(action_id)
+        dependencies[action_id] = frozenset(depends_on)
+
+    _check_acyclic(dependencies)
+    return MappingProxyType(dependencies)
+
+
+def _check_acyclic(dependencies: Mapping[str, frozenset[str]]) -> None:
+    visiting: list[str] = []
+    done: set[str] = set()
+
+    def visit(action_id: str) -> None:
+        if action_id in done:
+            return
+        if action_id in visiting:
+            cycle = visiting[visiting.index(action_id) :] + [action_id]
+            raise ValueError(f"Action dependency cycle: {' -> '.join(cycle)}")
+        visiting.append(action_id)
+        for dependency in sorted(dependencies.get(action_id, ())):
+            visit(dependency)
+        visiting.pop()
+        done.add(action_id)
+
+    for action_id in dependencies:
+        visit(action_id)
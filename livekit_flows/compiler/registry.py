@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass, fields, is_dataclass
+from pathlib import Path
+from threading import Lock
+from types import MappingProxyType
+from typing import Any, Callable, Union
+import asyncio
+import logging
+import re
+import sys
+
+from pydantic import BaseModel
+
+from ..core import ConversationFlow
+from .compiled_flow import CompiledFlow
+
+logger = logging.getLogger(__name__)
+
+_FLOW_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-][A-Za-z0-9_.-]*$")
+_FLOW_EXTENSIONS = (".yaml", ".yml", ".json")
+
+
+@dataclass(frozen=True)
+class FlowCacheStats:
+    hits: int
+    misses: int
+    memory_bytes: int
+    cached: bool
+    pinned: bool
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+@dataclass(frozen=True)
+class FlowRegistryStats:
+    flows: dict[str, FlowCacheStats]
+    memory_bytes: int
+    max_bytes: int
+    evictions: int
+    interned_strings: int
+
+
+def intern_strings(value: Any, pool: dict[str, str]) -> Any:
+    """Replace equal strings in a flow definition with one shared instance"""
+    if isinstance(value, str):
+        return pool.setdefault(value, value)
+    if isinstance(value, BaseModel):
+        # Written through __dict__ so validators and assignment hooks are skipped
+        for name, field_value in value.__dict__.items():
+            value.__dict__[name] = intern_strings(field_value, pool)
+        return value
+    if isinstance(value, dict):
+        return {
+            intern_strings(k, pool): intern_strings(v, pool) for k, v in value.items()
+        }
+    if isinstance(value, list):
+        return [intern_strings(item, pool) for item in value]
+    if isinstance(value, tuple):
+        return tuple(intern_strings(item, pool) for item in value)
+    return value
+
+
+def estimate_size(value: Any, seen: set[int] | None = None) -> int:
+    """Approximate deep size in bytes of a flow or compiled flow
+
+    Classes, functions and modules are shared by the process and not counted.
+    """
+    if seen is None:
+        seen = set()
+    if id(value) in seen or callable(value) or isinstance(value, type(sys)):
+        return 0
+    seen.add(id(value))
+
+    size = sys.getsizeof(value)
+    if isinstance(value, (str, bytes, int, float, bool)) or value is None:
+        return size
+    if isinstance(value, (dict, MappingProxyType)):
+        return size + sum(
+            estimate_size(k, seen) + estimate_size(v, seen) for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return size + sum(estimate_size(item, seen) for item in value)
+    if isinstance(value, BaseModel):
+        return size + estimate_size(value.__dict__, seen)
+    if is_dataclass(value):
+        return size + sum(
+            estimate_size(getattr(value, f.name), seen) for f in fields(value)
+        )
+    if hasattr(value, "__dict__"):
+        return size + estimate_size(vars(value), seen)
+    return size
+
+
+@dataclass
+class _Entry:
+    compiled: CompiledFlow
+    memory_bytes: int
+
+
+class FlowRegistry:
+    """Resolves flows by id and keeps their compiled form in a bounded LRU
+
+    Flows are loaded on first use through `loader`, so a worker only holds the
+    flows its sessions actually run. Pinned flows are never evicted. Strings
+    are interned across flows, flows built from one template share their
+    prompts and schemas.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[str], ConversationFlow],
+        max_bytes: int = 256 * 1024 * 1024,
+    ):
+        self.loader = loader
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._pinned: set[str] = set()
+        self._hits: dict[str, int] = {}
+        self._misses: dict[str, int] = {}
+        self._loading: dict[str, asyncio.Future[CompiledFlow]] = {}
+        self._strings: dict[str, str] = {}
+        self._memory_bytes = 0
+        self._evictions = 0
+        self._evicted_bytes = 0
+        self._lock = Lock()
+
+    @classmethod
+    def from_directory(
+        cls,
+        directory: Union[str, Path],
+        cache_dir: Union[str, Path, None] = None,
+        max_bytes: int = 256 * 1024 * 1024,
+    ) -> FlowRegistry:
+        """Registry of the `<flow_id>.yaml`, `.yml` or `.json` files in a directory"""
+        directory = Path(directory)
+
+        def load(flow_id: str) -> ConversationFlow:
+            for extension in _FLOW_EXTENSIONS:
+                path = directory / f"{flow_id}{extension}"
+                if path.exists():
+                    return ConversationFlow.from_file(path, cache_dir)
+            raise KeyError(f"Flow {flow_id} not found in {directory}")
+
+        return cls(load, max_bytes)
+
+    def _check_flow_id(self, flow_id: str) -> None:
+        # Flow ids often come from job metadata, keep them out of parent paths
+        if not _FLOW_ID_PATTERN.match(flow_id):
+            raise KeyError(f"Invalid flow id {flow_id!r}")
+
+    def _lookup(self, flow_id: str) -> CompiledFlow | None:
+        with self._lock:
+            entry = self._entries.get(flow_id)
+            if entry is None:
+                self._misses[flow_id] = self._misses.get(flow_id, 0) + 1
+                return None
+            self._entries.move_to_end(flow_id)
+            self._hits[flow_id] = self._hits.get(flow_id, 0) + 1
+            return entry.compiled
+
+    def _compile(self, flow_id: str) -> CompiledFlow:
+        flow = self.loader(flow_id)
+        with self._lock:
+            intern_strings(flow, self._strings)
+        return CompiledFlow.compile(flow, namespace=flow_id)
+
+    def _store(self, flow_id: str, compiled: CompiledFlow) -> None:
+        seen: set[int] = set()
+        memory_bytes = estimate_size(compiled.flow, seen) + estimate_size(
+            dict(compiled.nodes), seen
+        )
+        with self._lock:
+            previous = self._entries.pop(flow_id, None)
+            if previous is not None:
+                self._memory_bytes -= previous.memory_bytes
+            self._entries[flow_id] = _Entry(compiled, memory_bytes)
+            self._memory_bytes += memory_bytes
+            self._evict()
+
+    def _evict(self) -> None:
+        for flow_id in list(self._entries):
+            if self._memory_bytes <= self.max_bytes:
+                break
+            if flow_id in self._pinned:
+                continue
+            entry = self._entries.pop(flow_id)
+            self._memory_bytes -= entry.memory_bytes
+            self._evicted_bytes += entry.memory_bytes
+            self._evictions += 1
+            logger.debug(f"Evicted flow {flow_id} ({entry.memory_bytes} bytes)")
+
+        if self._evicted_bytes > self.max_bytes // 2:
+            # Drop strings only evicted flows used
+            self._strings = {}
+            for entry in self._entries.values():
+                intern_strings(entry.compiled.flow, self._strings)
+            self._evicted_bytes = 0
+
+    def load(self, flow_id: str) -> CompiledFlow:
+        """Return the compiled flow, loading it in the calling thread if needed"""
+        self._check_flow_id(flow_id)
+        compiled = self._lookup(flow_id)
+        if compiled is None:
+            compiled = self._compile(flow_id)
+            self._store(flow_id, compiled)
+        return compiled
+
+    async def get(self, flow_id: str) -> CompiledFlow:
+        """Return the compiled flow, loading it off the event loop if needed
+
+        Concurrent sessions asking for the same missing flow share one load.
+        """
+        self._check_flow_id(flow_id)
+        compiled = self._lookup(flow_id)
+        if compiled is not None:
+            return compiled
+
+        loading = self._loading.get(flow_id)
+        if loading is None:
+            loading = asyncio.ensure_future(self._load_async(flow_id))
+            self._loading[flow_id] = loading
+            loading.add_done_callback(lambda _: self._loading.pop(flow_id, None))
+        # A cancelled session must not cancel the load other sessions wait for
+        return await asyncio.shield(loading)
+
+    async def _load_async(self, flow_id: str) -> CompiledFlow:
+        compiled = await asyncio.to_thread(self._compile, flow_id)
+        self._store(flow_id, compiled)
+        return compiled
+
+    def pin(self, flow_id: str) -> None:
+        """Keep the flow cached once loaded, regardless of the memory bound"""
+        self._check_flow_id(flow_id)
+        with self._lock:
+            self._pinned.add(flow_id)
+
+    def unpin(self, flow_id: str) -> None:
+        with self._lock:
+            self._pinned.discard(flow_id)
+            self._evict()
+
+    def invalidate(self, flow_id: str) -> None:
+        """Drop a cached flow, the next lookup loads it again"""
+        with self._lock:
+            entry = self._entries.pop(flow_id, None)
+            if entry is not None:
+                self._memory_bytes -= entry.memory_bytes
+
+    def __contains__(self, flow_id: str) -> bool:
+        return flow_id in self._entries
+
+    def stats(self) -> FlowRegistryStats:
+        with self._lock:
+            flow_ids = {*self._hits, *self._misses, *self._entries, *self._pinned}
+            flows = {
+                flow_id: FlowCacheStats(
+                    hits=self._hits.get(flow_id, 0),
+                    misses=self._misses.get(flow_id, 0),
+                    memory_bytes=(
+                        self._entries[flow_id].memory_bytes
+                        if flow_id in self._entries
+                        else 0
+                    ),
+                    cached=flow_id in self._entries,
+                    pinned=flow_id in self._pinned,
+                )
+                for flow_id in sorted(flow_ids)
+            }
+            return FlowRegistryStats(
+                flows=flows,
+                memory_bytes=self._memory_bytes,
+                max_bytes=self.max_bytes,
+                evictions=self._evictions,
+                interned_strings=len(self._strings),
+            )
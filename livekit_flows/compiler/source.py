@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Union
+import asyncio
+import logging
+import os
+
+from ..core import ConversationFlow
+from .compiled_flow import CompiledFlow
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class FlowDiff:
+    added_nodes: tuple[str, ...] = ()
+    removed_nodes: tuple[str, ...] = ()
+    changed_nodes: tuple[str, ...] = ()
+    changed_actions: tuple[str, ...] = ()
+    settings_changed: bool = False
+
+    @property
+    def is_empty(self) -> bool:
+        return not (
+            self.added_nodes
+            or self.removed_nodes
+            or self.changed_nodes
+            or self.changed_actions
+            or self.settings_changed
+        )
+
+
+def _changed_keys(old: dict, new: dict) -> tuple[tuple, tuple, tuple]:
+    added = tuple(key for key in new if key not in old)
+    removed = tuple(key for key in old if key not in new)
+    changed = tuple(key for key in new if key in old and old[key] != new[key])
+    return added, removed, changed
+
+
+def diff_flows(old: ConversationFlow, new: ConversationFlow) -> FlowDiff:
+    added, removed, changed = _changed_keys(
+        {node.id: node for node in old.nodes}, {node.id: node for node in new.nodes}
+    )
+    actions = _changed_keys(
+        {action.id: action for action in old.actions},
+        {action.id: action for action in new.actions},
+    )
+    return FlowDiff(
+        added_nodes=added,
+        removed_nodes=removed,
+        changed_nodes=changed,
+        changed_actions=tuple(a for keys in actions for a in keys),
+        settings_changed=(
+            old.system_prompt != new.system_prompt
+            or old.initial_node != new.initial_node
+            or old.environment_variables != new.environment_variables
+            or old.settings != new.settings
+        ),
+    )
+
+
+class FlowSource:
+    """Flow file that is polled for changes and recompiled incrementally
+
+    `current` is replaced in a single assignment, so a new session gets either
+    the previous or the new version. Running agents keep the CompiledFlow they
+    were created with, transitions included.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        poll_interval: float = 1.0,
+        cache_dir: Union[str, Path, None] = None,
+    ):
+        self.path = Path(path)
+        self.poll_interval = poll_interval
+        self.cache_dir = cache_dir
+        self.version = 1
+        self._signature = self._stat()
+        self._current = CompiledFlow.compile(
+            ConversationFlow.from_file(self.path, self.cache_dir),
+            namespace=str(self.path),
+        )
+        self._watcher: asyncio.Task | None = None
+
+    @property
+    def current(self) -> CompiledFlow:
+        return self._current
+
+    def _stat(self) -> tuple[int, int] | None:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def reload(self, force: bool = False) -> FlowDiff | None:
+        """Recompile the flow if its file changed, returning what changed
+
+        A file that fails to load or compile is logged and the running version
+        stays in place until the file changes again.
+        """
+        signature = self._stat()
+        if signature is None or (signature == self._signature and not force):
+            return None
+        self._signature = signature
+
+        previous = self._current
+        try:
+            flow = ConversationFlow.from_file(self.path, self.cache_dir)
+            compiled = CompiledFlow.compile(flow, previous)
+        except (OSError, ValueError) as e:
+            logger.error(f"Keeping flow version {self.version}, reload failed: {e}")
+            return None
+
+        diff = diff_flows(previous.flow, flow)
+        self._current = compiled
+        self.version += 1
+        logger.info(
+            f"Reloaded {self.path} as version {self.version}: "
+            f"{len(diff.added_nodes)} added, {len(diff.removed_nodes)} removed, "
+            f"{len(diff.changed_nodes)} changed nodes"
+        )
+        return diff
+
+    async def watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            # Loading and compiling a large flow would stall the event loop
+            await asyncio.to_thread(self.reload)
+
+    def start(self) -> None:
+        if self._watcher is None or self._watcher.done():
+            self._watcher = asyncio.create_task(self.watch())
+
+    async def stop(self) -> None:
+        watcher, self._watcher = self._watcher, None
+        if watcher is not None:
+            watcher.cancel()
+            try:
+                await watcher
+            except asyncio.CancelledError:
+                pass
@@ -3,8 +3,15 @@ from .models import (
     Edge,
     FlowNode,
     ConversationFlow,
+    FlowSettings,
     CustomAction,
     ActionTrigger,
+    ActionCacheConfig,
+    RetryPolicy,
+    LatencyPolicy,
+    CircuitBreakerConfig,
+    RateLimitConfig,
+    ContextPolicy,
 )
 
 __all__ = [
@@ -12,7 +19,14 @@ __all__ = [
     "ActionTriggerType",
     "CustomAction",
     "ActionTrigger",
+    "ActionCacheConfig",
+    "RetryPolicy",
+    "LatencyPolicy",
+    "CircuitBreakerConfig",
+    "RateLimitConfig",
+    "ContextPolicy",
     "Edge",
     "FlowNode",
     "ConversationFlow",
+    "FlowSettings",
 ]
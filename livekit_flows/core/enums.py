@@ -8,6 +8,10 @@ class HttpMethod(str, Enum):
     PATCH = "PATCH"
     DELETE = "DELETE"
 
+    @property
+    def is_idempotent(self) -> bool:
+        return self in (HttpMethod.GET, HttpMethod.PUT, HttpMethod.DELETE)
+
 
 class ActionTriggerType(str, Enum):
     ON_ENTER = "on_enter"
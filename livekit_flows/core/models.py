@@ -1,15 +1,66 @@
-from typing import Self, Union, Any
+from typing import Literal, Self, Union, Any
 from pathlib import Path
 
-from pydantic import BaseModel, Field, field_validator
-from .enums import HttpMethod, ActionTriggerType
-from ..loaders import (
-    load_from_yaml_file,
-    load_from_yaml_string,
-    load_from_json_file,
-    load_from_json_string,
-    load_from_file,
+from pydantic import (
+    BaseModel,
+    Field,
+    PrivateAttr,
+    field_validator,
+    model_validator,
 )
+from .enums import HttpMethod, ActionTriggerType
+
+
+class ActionCacheConfig(BaseModel):
+    ttl: float = Field(default=60.0, gt=0)
+    max_entries: int = Field(default=1024, gt=0)
+    # Request headers in the cache key, None for all of them so responses to
+    # per-user credentials are never shared. Narrow it only to headers that
+    # cannot change the response
+    vary_headers: list[str] | None = None
+    revalidate: bool = True
+
+
+class RetryPolicy(BaseModel):
+    max_attempts: int = Field(default=3, ge=1)
+    base_delay: float = Field(default=0.1, gt=0)
+    max_delay: float = Field(default=2.0, gt=0)
+    retry_on_status: list[int] = Field(default_factory=lambda: [502, 503, 504])
+    retry_non_idempotent: bool = False
+
+
+class LatencyPolicy(BaseModel):
+    adaptive_timeout: bool = True
+    timeout_percentile: float = Field(default=0.99, gt=0, le=1)
+    timeout_multiplier: float = Field(default=2.0, ge=1)
+    min_timeout: float = Field(default=0.5, gt=0)
+    hedge: bool = False
+    hedge_percentile: float = Field(default=0.95, gt=0, le=1)
+    min_samples: int = Field(default=20, ge=1)
+
+
+class CircuitBreakerConfig(BaseModel):
+    scope: Literal["host", "action"] = "host"
+    window: int = Field(default=20, ge=1)
+    min_calls: int = Field(default=5, ge=1)
+    failure_threshold: float = Field(default=0.5, gt=0, le=1)
+    open_seconds: float = Field(default=30.0, gt=0)
+    half_open_max_calls: int = Field(default=1, ge=1)
+
+
+class RateLimitConfig(BaseModel):
+    scope: Literal["host", "action"] = "action"
+    rate: float | None = Field(default=None, gt=0)
+    burst: int | None = Field(default=None, ge=1)
+    max_concurrency: int | None = Field(default=None, ge=1)
+    on_limit: Literal["queue", "fail"] = "queue"
+    max_wait: float | None = Field(default=None, gt=0)
+
+    @model_validator(mode="after")
+    def check_has_limit(self) -> Self:
+        if self.rate is None and self.max_concurrency is None:
+            raise ValueError("Rate limit needs a rate, a max_concurrency or both")
+        return self
 
 
 class CustomAction(BaseModel):
@@ -22,6 +73,26 @@ class CustomAction(BaseModel):
     body_template: str | None = None
     timeout: int = 30
     store_response_as: str | None = None
+    cache: ActionCacheConfig | None = None
+    coalesce: bool = False
+    prefetch: bool = False
+    blocking: bool = True
+    extract: dict[str, str] | None = None
+    response_headers: list[str] | None = None
+    max_response_bytes: int | None = Field(default=None, gt=0)
+    retry: RetryPolicy | None = None
+    latency: LatencyPolicy | None = None
+    circuit_breaker: CircuitBreakerConfig | None = None
+    fallback_result: dict[str, Any] | None = None
+    rate_limits: list[RateLimitConfig] = Field(default_factory=list)
+
+    @model_validator(mode="after")
+    def check_prefetch_is_safe(self) -> Self:
+        if self.prefetch and self.method != HttpMethod.GET:
+            raise ValueError(
+                f"Action {self.id} uses {self.method.value}, only GET actions can be prefetched"
+            )
+        return self
 
 
 class ActionTrigger(BaseModel):
@@ -57,39 +128,121 @@ class Edge(BaseModel):
         return v
 
 
+class ContextPolicy(BaseModel):
+    fresh: bool = False
+    max_turns: int | None = Field(default=None, ge=1)
+    drop_tool_calls: bool = False
+    summarize_userdata: bool = False
+
+
 class FlowNode(BaseModel):
     id: str
     name: str
     instruction: str | None = None
     static_text: str | None = None
+    filler_text: str | None = None
+    action_deadline: float | None = Field(default=None, gt=0)
+    context_policy: ContextPolicy | None = None
     is_final: bool = False
     edges: list[Edge] = Field(default_factory=list)
     actions: list[ActionTrigger] = Field(default_factory=list)
 
 
+class FlowSettings(BaseModel):
+    prefetch_actions: bool = False
+    action_deadline: float | None = Field(default=None, gt=0)
+    max_concurrent_actions: int | None = Field(default=None, ge=1)
+    transition_mode: Literal["handoff", "in_place"] = "handoff"
+    tool_handoff: bool = False
+    context_policy: ContextPolicy | None = None
+    prompt_layout: Literal["default", "cache_friendly"] = "default"
+
+
 class ConversationFlow(BaseModel):
     system_prompt: str
     initial_node: str
     nodes: list[FlowNode]
     actions: list[CustomAction] = Field(default_factory=list)
     environment_variables: dict[str, str] = Field(default_factory=dict)
+    settings: FlowSettings = Field(default_factory=FlowSettings)
+
+    # Compiled form, kept on the instance so it is freed along with the flow
+    _compiled: Any = PrivateAttr(default=None)
+
+    @model_validator(mode="after")
+    def check_action_dependencies(self) -> Self:
+        actions = {action.id: action for action in self.actions}
+        for node in self.nodes:
+            for trigger_type in ActionTriggerType:
+                triggers = [t for t in node.actions if t.trigger_type == trigger_type]
+                # A cycle needs two actions, single ones skip the template parser
+                if len(triggers) < 2:
+                    continue
+                from ..compiler.dependencies import infer_action_dependencies
+
+                try:
+                    infer_action_dependencies(triggers, actions)
+                except ValueError as e:
+                    raise ValueError(f"Node {node.id}: {e}") from e
+        return self
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if name in type(self).model_fields:
+            self._compiled = None
+
+    def __eq__(self, other: object) -> bool:
+        # The compiled form is a cache, not part of the flow's value
+        if not isinstance(other, ConversationFlow):
+            return NotImplemented
+        return type(self) is type(other) and self.__dict__ == other.__dict__
+
+    def __deepcopy__(self, memo: dict[int, Any] | None = None) -> Self:
+        # The copy compiles itself on first use
+        memo = {} if memo is None else memo
+        if self._compiled is not None:
+            memo[id(self._compiled)] = None
+        return super().__deepcopy__(memo)
+
+    def __getstate__(self) -> dict[Any, Any]:
+        state = super().__getstate__()
+        private = state.get("__pydantic_private__")
+        if private:
+            state["__pydantic_private__"] = {**private, "_compiled": None}
+        return state
 
     @classmethod
-    def from_yaml_file(cls, file_path: Union[str, Path]) -> Self:
-        return load_from_yaml_file(cls, file_path)
+    def from_yaml_file(
+        cls, file_path: Union[str, Path], cache_dir: Union[str, Path, None] = None
+    ) -> Self:
+        from ..loaders import load_from_yaml_file
+
+        return load_from_yaml_file(cls, file_path, cache_dir)
 
     @classmethod
     def from_yaml_string(cls, yaml_string: str) -> Self:
+        from ..loaders import load_from_yaml_string
+
         return load_from_yaml_string(cls, yaml_string)
 
     @classmethod
-    def from_json_file(cls, file_path: Union[str, Path]) -> Self:
-        return load_from_json_file(cls, file_path)
+    def from_json_file(
+        cls, file_path: Union[str, Path], cache_dir: Union[str, Path, None] = None
+    ) -> Self:
+        from ..loaders import load_from_json_file
+
+        return load_from_json_file(cls, file_path, cache_dir)
 
     @classmethod
     def from_json_string(cls, json_string: str) -> Self:
+        from ..loaders import load_from_json_string
+
         return load_from_json_string(cls, json_string)
 
     @classmethod
-    def from_file(cls, file_path: Union[str, Path]) -> Self:
-        return load_from_file(cls, file_path)
+    def from_file(
+        cls, file_path: Union[str, Path], cache_dir: Union[str, Path, None] = None
+    ) -> Self:
+        from ..loaders import load_from_file
+
+        return load_from_file(cls, file_path, cache_dir)
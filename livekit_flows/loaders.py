@@ -1,34 +1,136 @@
+import functools
+import hashlib
 import json
+import logging
+import os
+import pickle
+import tempfile
 from pathlib import Path
-from typing import Union, Type, TypeVar
+from typing import Any, Callable, Union, Type, TypeVar
 
+import pydantic
 import yaml
 from pydantic import BaseModel, ValidationError
 
+from .version import __version__
+
 T = TypeVar("T", bound=BaseModel)
 
+logger = logging.getLogger(__name__)
+
+# libyaml's loader is several times faster, fall back when PyYAML lacks it
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def _parse_yaml(content: str | bytes) -> Any:
+    return yaml.load(content, Loader=YamlLoader)
+
+
+@functools.cache
+def _schema_fingerprint(model_cls: Type[BaseModel]) -> str:
+    # Covers model changes made without a version bump
+    schema = json.dumps(model_cls.model_json_schema(), sort_keys=True)
+    return hashlib.sha256(schema.encode("utf-8")).hexdigest()
+
+
+def artifact_key(model_cls: Type[BaseModel], content: bytes) -> str:
+    """Key of a validated flow
+
+    Changes with the content, the model's schema and the library versions.
+    """
+    digest = hashlib.sha256()
+    for part in (
+        __version__,
+        pydantic.VERSION,
+        f"{model_cls.__module__}.{model_cls.__qualname__}",
+        _schema_fingerprint(model_cls),
+    ):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    digest.update(content)
+    return digest.hexdigest()
 
-def load_from_yaml_file(model_cls: Type[T], file_path: Union[str, Path]) -> T:
-    file_path = Path(file_path)
 
+def _read_artifact(path: Path, model_cls: Type[T]) -> T | None:
+    try:
+        with open(path, "rb") as f:
+            model = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable flow artifact {path}: {e}")
+        return None
+
+    if not isinstance(model, model_cls):
+        logger.warning(f"Ignoring flow artifact {path} of unexpected type")
+        return None
+    return model
+
+
+def _write_artifact(path: Path, model: BaseModel) -> None:
+    # Written to a temporary file first so readers never see a partial artifact
+    tmp_path = None
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.warning(f"Could not write flow artifact {path}: {e}")
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def _load_file(
+    model_cls: Type[T],
+    file_path: Path,
+    parse: Callable[[bytes], T],
+    cache_dir: Union[str, Path, None],
+) -> T:
     if not file_path.exists():
         raise FileNotFoundError(f"Flow file not found: {file_path}")
 
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            data = yaml.safe_load(f)
-    except yaml.YAMLError as e:
-        raise ValueError(f"Invalid YAML in {file_path}: {e}")
+    content = file_path.read_bytes()
+    if cache_dir is None:
+        return parse(content)
+
+    artifact_path = Path(cache_dir) / f"{artifact_key(model_cls, content)}.pickle"
+    model = _read_artifact(artifact_path, model_cls)
+    if model is None:
+        model = parse(content)
+        _write_artifact(artifact_path, model)
+    return model
 
-    try:
-        return model_cls.model_validate(data)
-    except ValidationError as e:
-        raise ValueError(f"Invalid flow definition in {file_path}: {e}")
+
+def load_from_yaml_file(
+    model_cls: Type[T],
+    file_path: Union[str, Path],
+    cache_dir: Union[str, Path, None] = None,
+) -> T:
+    """Load a flow from YAML, reusing the validated flow stored in `cache_dir`
+
+    Artifacts are pickles, so `cache_dir` must only be writable by trusted users.
+    """
+    file_path = Path(file_path)
+
+    def parse(content: bytes) -> T:
+        try:
+            data = _parse_yaml(content)
+        except yaml.YAMLError as e:
+            raise ValueError(f"Invalid YAML in {file_path}: {e}")
+
+        try:
+            return model_cls.model_validate(data)
+        except ValidationError as e:
+            raise ValueError(f"Invalid flow definition in {file_path}: {e}")
+
+    return _load_file(model_cls, file_path, parse, cache_dir)
 
 
 def load_from_yaml_string(model_cls: Type[T], yaml_string: str) -> T:
     try:
-        data = yaml.safe_load(yaml_string)
+        data = _parse_yaml(yaml_string)
     except yaml.YAMLError as e:
         raise ValueError(f"Invalid YAML content: {e}")
 
@@ -38,37 +140,57 @@ def load_from_yaml_string(model_cls: Type[T], yaml_string: str) -> T:
         raise ValueError(f"Invalid flow definition: {e}")
 
 
-def load_from_json_file(model_cls: Type[T], file_path: Union[str, Path]) -> T:
-    file_path = Path(file_path)
-
-    if not file_path.exists():
-        raise FileNotFoundError(f"Flow file not found: {file_path}")
+class _InvalidJsonError(ValueError):
+    pass
 
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    except json.JSONDecodeError as e:
-        raise ValueError(f"Invalid JSON in {file_path}: {e}")
 
+def _validate_json(model_cls: Type[T], content: str | bytes) -> T:
+    # Parsing and validating in one pass skips building the intermediate dict
     try:
-        return model_cls.model_validate(data)
+        return model_cls.model_validate_json(content)
     except ValidationError as e:
-        raise ValueError(f"Invalid flow definition in {file_path}: {e}")
+        for error in e.errors():
+            if error["type"] == "json_invalid":
+                raise _InvalidJsonError(error["msg"]) from None
+        raise
+
+
+def load_from_json_file(
+    model_cls: Type[T],
+    file_path: Union[str, Path],
+    cache_dir: Union[str, Path, None] = None,
+) -> T:
+    """Load a flow from JSON, reusing the validated flow stored in `cache_dir`
+
+    Artifacts are pickles, so `cache_dir` must only be writable by trusted users.
+    """
+    file_path = Path(file_path)
+
+    def parse(content: bytes) -> T:
+        try:
+            return _validate_json(model_cls, content)
+        except _InvalidJsonError as e:
+            raise ValueError(f"Invalid JSON in {file_path}: {e}")
+        except ValidationError as e:
+            raise ValueError(f"Invalid flow definition in {file_path}: {e}")
+
+    return _load_file(model_cls, file_path, parse, cache_dir)
 
 
 def load_from_json_string(model_cls: Type[T], json_string: str) -> T:
     try:
-        data = json.loads(json_string)
-    except json.JSONDecodeError as e:
+        return _validate_json(model_cls, json_string)
+    except _InvalidJsonError as e:
         raise ValueError(f"Invalid JSON content: {e}")
-
-    try:
-        return model_cls.model_validate(data)
     except ValidationError as e:
         raise ValueError(f"Invalid flow definition: {e}")
 
 
-def load_from_file(model_cls: Type[T], file_path: Union[str, Path]) -> T:
+def load_from_file(
+    model_cls: Type[T],
+    file_path: Union[str, Path],
+    cache_dir: Union[str, Path, None] = None,
+) -> T:
     file_path = Path(file_path)
 
     if not file_path.exists():
@@ -77,9 +199,9 @@ def load_from_file(model_cls: Type[T], file_path: Union[str, Path]) -> T:
     extension = file_path.suffix.lower()
 
     if extension in [".yaml", ".yml"]:
-        return load_from_yaml_file(model_cls, file_path)
+        return load_from_yaml_file(model_cls, file_path, cache_dir)
     elif extension == ".json":
-        return load_from_json_file(model_cls, file_path)
+        return load_from_json_file(model_cls, file_path, cache_dir)
     else:
         raise ValueError(
             f"Unsupported file extension '{extension}'. "
@@ -1,5 +1,29 @@
-from .renderer import TemplateRenderer
+from .renderer import (
+    TemplateRenderer,
+    TemplateCache,
+    TemplateCacheStats,
+    get_template_cache,
+    get_template_renderer,
+    iter_flow_templates,
+)
+from .analysis import (
+    TemplateDependencies,
+    referenced_keys,
+    referenced_action_results,
+    template_dependencies,
+)
+from .context import TemplateContext
 
 __all__ = [
     "TemplateRenderer",
+    "TemplateCache",
+    "TemplateCacheStats",
+    "get_template_cache",
+    "get_template_renderer",
+    "iter_flow_templates",
+    "referenced_keys",
+    "referenced_action_results",
+    "TemplateDependencies",
+    "template_dependencies",
+    "TemplateContext",
 ]
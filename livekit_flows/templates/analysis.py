@@ -0,0 +1,81 @@
+from dataclasses import dataclass
+from functools import lru_cache
+
+from jinja2 import nodes
+from jinja2.exceptions import TemplateSyntaxError
+
+from .renderer import get_template_cache
+
+# Jinja resolves attributes before items, so `userdata.items` is the method
+_DICT_METHODS = frozenset(name for name in dir(dict) if not name.startswith("_"))
+
+
+@lru_cache(maxsize=4096)
+def referenced_keys(source: str, root: str) -> frozenset[str] | None:
+    """Keys of `root` a template reads, e.g. {"name"} for `{{ userdata.name }}`
+
+    Returns None when the template uses `root` as a whole (loops, filters,
+    dynamic keys, method calls) or cannot be parsed, meaning every key may be
+    read.
+    """
+    try:
+        ast = get_template_cache().environment.parse(source)
+    except TemplateSyntaxError:
+        return None
+
+    keys: set[str] = set()
+    accessed: set[int] = set()
+    called = {id(call.node) for call in ast.find_all(nodes.Call)}
+
+    for node in ast.find_all((nodes.Getattr, nodes.Getitem)):
+        target = node.node
+        if not isinstance(target, nodes.Name) or target.name != root:
+            continue
+        # Method calls such as `env.get(...)` may read any key
+        if id(node) in called:
+            return None
+        if isinstance(node, nodes.Getattr):
+            if node.attr in _DICT_METHODS:
+                return None
+            keys.add(node.attr)
+        elif isinstance(node.arg, nodes.Const) and isinstance(node.arg.value, str):
+            keys.add(node.arg.value)
+        else:
+            return None
+        accessed.add(id(target))
+
+    for name in ast.find_all(nodes.Name):
+        if name.name == root and id(name) not in accessed:
+            return None
+
+    return frozenset(keys)
+
+
+def referenced_action_results(*sources: str | None) -> frozenset[str] | None:
+    """Union of `actions.*` keys read by the templates, None if unbounded"""
+    keys: set[str] = set()
+    for source in sources:
+        if not source:
+            continue
+        source_keys = referenced_keys(source, "actions")
+        if source_keys is None:
+            return None
+        keys |= source_keys
+    return frozenset(keys)
+
+
+@dataclass(frozen=True)
+class TemplateDependencies:
+    userdata: frozenset[str] | None
+    actions: frozenset[str] | None
+    env: frozenset[str] | None
+
+
+@lru_cache(maxsize=4096)
+def template_dependencies(source: str) -> TemplateDependencies:
+    """Keys of each context root a template reads, None where unbounded"""
+    return TemplateDependencies(
+        userdata=referenced_keys(source, "userdata"),
+        actions=referenced_keys(source, "actions"),
+        env=referenced_keys(source, "env"),
+    )
@@ -0,0 +1,97 @@
+from typing import Any, Mapping
+
+from pydantic import BaseModel
+
+from .analysis import template_dependencies
+
+_MISSING = object()
+_SCALARS = (str, int, float, bool, type(None))
+
+
+def _select(
+    values: Mapping[str, Any], keys: frozenset[str] | None
+) -> Mapping[str, Any]:
+    if keys is None:
+        return values
+    return {key: values[key] for key in keys if key in values}
+
+
+class TemplateContext:
+    """Per-session render context with an incrementally updated userdata snapshot
+
+    Each template only gets the `userdata`, `actions` and `env` keys it reads.
+    Userdata fields are dumped once and reused while the attribute holds the
+    same object, values changed in place (e.g. a list appended to) need
+    `invalidate()`.
+    """
+
+    __slots__ = ("environment_vars", "action_results", "_userdata", "_snapshot")
+
+    def __init__(
+        self,
+        environment_vars: dict[str, str] | None = None,
+        action_results: dict[str, Any] | None = None,
+    ):
+        self.environment_vars = environment_vars if environment_vars is not None else {}
+        self.action_results = action_results if action_results is not None else {}
+        self._userdata: BaseModel | None = None
+        self._snapshot: dict[str, tuple[Any, Any]] = {}
+
+    def _bind(self, userdata: BaseModel) -> None:
+        if userdata is not self._userdata:
+            self._userdata = userdata
+            self._snapshot = {}
+
+    def _dump_field(self, userdata: BaseModel, key: str) -> Any:
+        raw = userdata.__dict__.get(key, _MISSING)
+        cached = self._snapshot.get(key)
+        if cached is not None and cached[0] is raw:
+            return cached[1]
+
+        if isinstance(raw, _SCALARS):
+            dumped = raw
+        else:
+            dumped = userdata.model_dump(include={key}).get(key)
+        self._snapshot[key] = (raw, dumped)
+        return dumped
+
+    def userdata_values(
+        self, userdata: BaseModel | None, keys: frozenset[str] | None = None
+    ) -> dict[str, Any]:
+        """Dumped userdata fields, limited to `keys` unless None"""
+        if userdata is None:
+            return {}
+        self._bind(userdata)
+        fields = userdata.__dict__
+        if keys is None:
+            keys = fields.keys()
+        return {key: self._dump_field(userdata, key) for key in keys if key in fields}
+
+    def update_userdata(self, userdata: BaseModel, values: dict[str, Any]) -> None:
+        """Set userdata attributes and refresh only their snapshot entries"""
+        self._bind(userdata)
+        for key, value in values.items():
+            setattr(userdata, key, value)
+            self._snapshot.pop(key, None)
+            self._dump_field(userdata, key)
+
+    def invalidate(self) -> None:
+        self._snapshot.clear()
+
+    def for_template(
+        self,
+        source: str,
+        userdata: BaseModel | None = None,
+        custom_context: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        dependencies = template_dependencies(source)
+        context = {
+            "env": _select(self.environment_vars, dependencies.env),
+            "actions": _select(self.action_results, dependencies.actions),
+            "userdata": self.userdata_values(userdata, dependencies.userdata),
+        }
+
+        if custom_context:
+            context.update(custom_context)
+
+        return context
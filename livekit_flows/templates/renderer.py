@@ -1,14 +1,130 @@
-from typing import Any
-from jinja2 import Environment, BaseLoader
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import TYPE_CHECKING, Any, Iterator
+from jinja2 import Environment, BaseLoader, Template
 from pydantic import BaseModel
 import logging
 
+if TYPE_CHECKING:
+    from ..core import ConversationFlow
+    from .context import TemplateContext
+
 logger = logging.getLogger(__name__)
 
+DEFAULT_TEMPLATE_CACHE_SIZE = 4096
+
+
+@dataclass(frozen=True)
+class TemplateCacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    maxsize: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class TemplateCache:
+    """Bounded LRU cache of compiled Jinja templates keyed by source text"""
+
+    def __init__(
+        self,
+        maxsize: int = DEFAULT_TEMPLATE_CACHE_SIZE,
+        environment: Environment | None = None,
+    ):
+        if maxsize <= 0:
+            raise ValueError("Template cache maxsize must be positive")
+
+        self.environment = environment or Environment(loader=BaseLoader())
+        self.maxsize = maxsize
+        self._templates: OrderedDict[str, Template] = OrderedDict()
+        self._lock = Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, source: str) -> Template:
+        with self._lock:
+            template = self._templates.get(source)
+            if template is not None:
+                self._templates.move_to_end(source)
+                self._hits += 1
+                return template
+            self._misses += 1
+
+        # Compile outside the lock, a duplicate compile on a race is harmless
+        template = self.environment.from_string(source)
+
+        with self._lock:
+            self._templates[source] = template
+            self._templates.move_to_end(source)
+            while len(self._templates) > self.maxsize:
+                self._templates.popitem(last=False)
+                self._evictions += 1
+
+        return template
+
+    def __contains__(self, source: str) -> bool:
+        return source in self._templates
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    def stats(self) -> TemplateCacheStats:
+        return TemplateCacheStats(
+            hits=self._hits,
+            misses=self._misses,
+            evictions=self._evictions,
+            size=len(self._templates),
+            maxsize=self.maxsize,
+        )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._templates.clear()
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+
+
+_shared_template_cache = TemplateCache()
+
+
+def get_template_cache() -> TemplateCache:
+    """Return the process-wide template cache shared by all renderers"""
+    return _shared_template_cache
+
+
+def iter_flow_templates(flow: ConversationFlow) -> Iterator[str]:
+    """Yield every template source used by a flow"""
+    for node in flow.nodes:
+        if node.instruction:
+            yield node.instruction
+        if node.static_text:
+            yield node.static_text
+        if node.filler_text:
+            yield node.filler_text
+
+    for action in flow.actions:
+        yield action.url
+        yield from action.headers.values()
+        if action.body_template:
+            yield action.body_template
+
 
 class TemplateRenderer:
-    def __init__(self):
-        self.jinja_env = Environment(loader=BaseLoader())
+    __slots__ = ("cache", "jinja_env")
+
+    def __init__(self, cache: TemplateCache | None = None):
+        self.cache = cache if cache is not None else get_template_cache()
+        self.jinja_env = self.cache.environment
 
     def build_context(
         self,
@@ -30,7 +146,7 @@ class TemplateRenderer:
 
     def render(self, template_str: str, context: dict[str, Any]) -> str:
         try:
-            template = self.jinja_env.from_string(template_str)
+            template = self.cache.get(template_str)
             return template.render(**context)
         except Exception as e:
             logger.error(f"Template rendering error: {e}")
@@ -44,10 +160,43 @@ class TemplateRenderer:
         action_results: dict[str, Any] | None = None,
         custom_context: dict[str, Any] | None = None,
     ) -> str:
-        context = self.build_context(
-            userdata=userdata,
-            environment_vars=environment_vars,
-            action_results=action_results,
-            custom_context=custom_context,
+        from .context import TemplateContext
+
+        context = TemplateContext(environment_vars, action_results)
+        return self.render_in(template_str, context, userdata, custom_context)
+
+    def render_in(
+        self,
+        template_str: str,
+        context: TemplateContext,
+        userdata: BaseModel | None = None,
+        custom_context: dict[str, Any] | None = None,
+    ) -> str:
+        """Render with only the context keys the template reads"""
+        return self.render(
+            template_str, context.for_template(template_str, userdata, custom_context)
         )
-        return self.render(template_str, context)
+
+    def precompile(self, template_str: str) -> bool:
+        try:
+            self.cache.get(template_str)
+            return True
+        except Exception as e:
+            logger.warning(f"Template compilation error: {e}")
+            return False
+
+    def precompile_flow(self, flow: ConversationFlow) -> int:
+        """Compile every template in the flow ahead of time, returns the count compiled"""
+        return sum(
+            1
+            for template_str in iter_flow_templates(flow)
+            if self.precompile(template_str)
+        )
+
+
+_shared_template_renderer = TemplateRenderer()
+
+
+def get_template_renderer() -> TemplateRenderer:
+    """Return the renderer over the shared cache, it holds no per-session state"""
+    return _shared_template_renderer
@@ -1,8 +1,25 @@
-from .model_generator import generate_userdata_class
-from .schema_validator import validate_against_schema, is_valid_json_schema
+from .model_generator import (
+    generate_userdata_class,
+    userdata_schema_hash,
+    clear_userdata_class_cache,
+)
+from .schema_validator import (
+    validate_against_schema,
+    is_valid_json_schema,
+    compile_validator,
+    clear_validator_cache,
+    SchemaValidator,
+    FastObjectValidator,
+)
 
 __all__ = [
     "generate_userdata_class",
+    "userdata_schema_hash",
+    "clear_userdata_class_cache",
     "validate_against_schema",
     "is_valid_json_schema",
+    "compile_validator",
+    "clear_validator_cache",
+    "SchemaValidator",
+    "FastObjectValidator",
 ]
@@ -1,7 +1,13 @@
 from pydantic import BaseModel, Field, create_model
+from threading import Lock
 from typing import Optional, Type, Any
+import hashlib
+import json
 from ..core import ConversationFlow
 
+_userdata_class_cache: dict[str, Type[BaseModel]] = {}
+_userdata_class_cache_lock = Lock()
+
 
 def _get_python_type_from_json_schema(
     schema_type: str, schema_format: str | None = None
@@ -71,10 +77,47 @@ def _build_field_map_from_schemas(flow: ConversationFlow) -> dict[str, tuple]:
     return all_field_definitions
 
 
-def generate_userdata_class(
+def userdata_schema_hash(
     flow: ConversationFlow, class_name: str = "FlowUserData"
+) -> str:
+    """Content hash of every input schema that contributes to the userdata class"""
+    schemas = [
+        edge.input_schema
+        for node in flow.nodes
+        for edge in node.edges
+        if edge.input_schema
+    ]
+    payload = json.dumps([class_name, schemas], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def generate_userdata_class(
+    flow: ConversationFlow, class_name: str = "FlowUserData", use_cache: bool = True
 ) -> Type[BaseModel]:
-    """Generate a Pydantic model class from all input schemas in the flow"""
+    """Generate a Pydantic model class from all input schemas in the flow
+
+    Classes are memoized process-wide by a content hash of the schemas, so flows
+    with identical schemas share one class.
+    """
+    if not use_cache:
+        return _create_userdata_class(flow, class_name)
+
+    key = userdata_schema_hash(flow, class_name)
+    cached = _userdata_class_cache.get(key)
+    if cached is not None:
+        return cached
+
+    userdata_class = _create_userdata_class(flow, class_name)
+    with _userdata_class_cache_lock:
+        return _userdata_class_cache.setdefault(key, userdata_class)
+
+
+def clear_userdata_class_cache() -> None:
+    with _userdata_class_cache_lock:
+        _userdata_class_cache.clear()
+
+
+def _create_userdata_class(flow: ConversationFlow, class_name: str) -> Type[BaseModel]:
     field_definitions = _build_field_map_from_schemas(flow)
 
     if not field_definitions:
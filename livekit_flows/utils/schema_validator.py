@@ -1,15 +1,177 @@
+import json
 import logging
-from typing import Any
+from collections import deque
+from threading import Lock
+from typing import Any, Protocol
 from jsonschema import ValidationError, Draft7Validator
 
 logger = logging.getLogger(__name__)
 
 
+class SchemaValidator(Protocol):
+    def validate(self, instance: Any) -> None: ...
+
+
+_validator_cache: dict[str, SchemaValidator] = {}
+_schema_check_cache: dict[str, bool] = {}
+_cache_lock = Lock()
+
+# JSON Schema type name -> Python expression checking `value`, mirroring the
+# Draft 7 type checker (booleans are not numbers, 1.0 is an integer)
+_TYPE_CHECKS = {
+    "string": "isinstance(value, str)",
+    "integer": (
+        "(isinstance(value, int) and not isinstance(value, bool))"
+        " or (isinstance(value, float) and value.is_integer())"
+    ),
+    "number": "isinstance(value, (int, float)) and not isinstance(value, bool)",
+    "boolean": "isinstance(value, bool)",
+    "array": "isinstance(value, list)",
+    "object": "isinstance(value, dict)",
+    "null": "value is None",
+}
+_ANNOTATION_KEYWORDS = {"title", "description", "default", "examples", "format"}
+_OBJECT_KEYWORDS = {"type", "properties", "required", "additionalProperties"}
+
+
+def schema_key(schema: dict[str, Any]) -> str:
+    return json.dumps(schema, sort_keys=True, default=str)
+
+
+def _is_simple_schema(schema: dict[str, Any]) -> bool:
+    if schema.get("type") != "object":
+        return False
+    if not set(schema) <= _OBJECT_KEYWORDS | _ANNOTATION_KEYWORDS:
+        return False
+    if not isinstance(schema.get("additionalProperties", True), bool):
+        return False
+
+    required = schema.get("required", [])
+    if not isinstance(required, list) or not all(isinstance(r, str) for r in required):
+        return False
+
+    properties = schema.get("properties", {})
+    if not isinstance(properties, dict):
+        return False
+
+    for property_schema in properties.values():
+        if not isinstance(property_schema, dict):
+            return False
+        if not set(property_schema) <= {"type"} | _ANNOTATION_KEYWORDS:
+            return False
+        # Type lists such as ["string", "null"] are left to jsonschema
+        property_type = property_schema.get("type", "string")
+        if not isinstance(property_type, str) or property_type not in _TYPE_CHECKS:
+            return False
+
+    return True
+
+
+def _generate_validator_source(schema: dict[str, Any]) -> str:
+    properties = schema.get("properties", {})
+    lines = [
+        "def validate(instance):",
+        "    if not isinstance(instance, dict):",
+        "        raise ValidationError(f\"{instance!r} is not of type 'object'\")",
+    ]
+
+    for name in schema.get("required", []):
+        lines += [
+            f"    if {name!r} not in instance:",
+            f"        raise ValidationError({f'{name!r} is a required property'!r})",
+        ]
+
+    for name, property_schema in properties.items():
+        if "type" not in property_schema:
+            continue
+        type_name = property_schema["type"]
+        lines += [
+            f"    value = instance.get({name!r}, _MISSING)",
+            f"    if value is not _MISSING and not ({_TYPE_CHECKS[type_name]}):",
+            "        raise ValidationError(",
+            f'            f"{{value!r}} is not of type {type_name!r}",',
+            f"            path=deque([{name!r}]),",
+            "        )",
+        ]
+
+    if schema.get("additionalProperties", True) is False:
+        lines += [
+            f"    extra = [key for key in instance if key not in {set(properties)!r}]",
+            "    if extra:",
+            "        unexpected = ', '.join(repr(key) for key in extra)",
+            "        verb = 'were' if len(extra) > 1 else 'was'",
+            "        raise ValidationError(",
+            "            f'Additional properties are not allowed ({unexpected} {verb} unexpected)'",
+            "        )",
+        ]
+
+    return "\n".join(lines) + "\n"
+
+
+class FastObjectValidator:
+    """Generated validator for flat object schemas with typed properties
+
+    Only handles `type`, `properties`, `required` and boolean
+    `additionalProperties`, anything else goes through jsonschema.
+    """
+
+    def __init__(self, schema: dict[str, Any]):
+        self.schema = schema
+        self.source = _generate_validator_source(schema)
+        namespace: dict[str, Any] = {
+            "ValidationError": ValidationError,
+            "deque": deque,
+            "_MISSING": object(),
+        }
+        exec(compile(self.source, "<schema_validator>", "exec"), namespace)
+        self._validate = namespace["validate"]
+
+    def validate(self, instance: Any) -> None:
+        self._validate(instance)
+
+    def is_valid(self, instance: Any) -> bool:
+        try:
+            self._validate(instance)
+            return True
+        except ValidationError:
+            return False
+
+
+def compile_validator(
+    schema: dict[str, Any], fast: bool = True, use_cache: bool = True
+) -> SchemaValidator:
+    """Return a validator for the schema, cached process-wide by schema content"""
+    if not use_cache:
+        return _build_validator(schema, fast)
+
+    key = f"{int(fast)}:{schema_key(schema)}"
+    validator = _validator_cache.get(key)
+    if validator is None:
+        validator = _build_validator(schema, fast)
+        with _cache_lock:
+            validator = _validator_cache.setdefault(key, validator)
+    return validator
+
+
+def _build_validator(schema: dict[str, Any], fast: bool) -> SchemaValidator:
+    if fast and _is_simple_schema(schema):
+        return FastObjectValidator(schema)
+    return Draft7Validator(schema)
+
+
+def clear_validator_cache() -> None:
+    with _cache_lock:
+        _validator_cache.clear()
+        _schema_check_cache.clear()
+
+
 def validate_against_schema(
-    data: dict[str, Any], schema: dict[str, Any]
+    data: dict[str, Any],
+    schema: dict[str, Any],
+    validator: SchemaValidator | None = None,
 ) -> tuple[bool, str | None]:
     try:
-        validator = Draft7Validator(schema)
+        validator = validator or compile_validator(schema)
         validator.validate(data)
 
         return True, None
@@ -26,9 +188,17 @@ def validate_against_schema(
 
 
 def is_valid_json_schema(schema: dict[str, Any]) -> bool:
+    key = schema_key(schema)
+    cached = _schema_check_cache.get(key)
+    if cached is not None:
+        return cached
+
     try:
         Draft7Validator.check_schema(schema)
-        return True
+        result = True
     except Exception as e:
         logger.warning(f"Invalid JSON Schema: {e}")
-        return False
+        result = False
+
+    _schema_check_cache[key] = result
+    return result
@@ -0,0 +1,553 @@
+import asyncio
+
+import pytest
+from pydantic import BaseModel, ValidationError
+from aiohttp.web import Application, Response, json_response
+from livekit_flows import ActionCacheConfig, CustomAction, HttpMethod
+from livekit_flows.core import (
+    CircuitBreakerConfig,
+    LatencyPolicy,
+    RateLimitConfig,
+    RetryPolicy,
+)
+from livekit_flows.actions import (
+    ActionExecutor,
+    HttpClientPool,
+    HttpPoolConfig,
+    clear_response_caches,
+    get_response_cache,
+    CircuitBreaker,
+    CircuitState,
+    clear_circuit_breakers,
+    clear_latency_trackers,
+    get_circuit_breaker,
+    get_latency_tracker,
+    get_single_flight,
+    prefetch_stats,
+    clear_rate_limiters,
+    rate_limiter_stats,
+)
+
+
+@pytest.fixture
+async def http_pool():
+    pool = HttpClientPool(HttpPoolConfig(limit=10, limit_per_host=2))
+    yield pool
+    await pool.close()
+
+
+@pytest.fixture
+async def server(aiohttp_server):
+    peers = []
+
+    async def handler(request):
+        peers.append(request.transport.get_extra_info("peername"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return Response(status=304)
+        return json_response({"fact": "Cats sleep a lot"}, headers={"ETag": '"v1"'})
+
+    async def slow_handler(request):
+        peers.append(request.transport.get_extra_info("peername"))
+        await asyncio.sleep(0.05)
+        return json_response({"fact": "Cats sleep a lot"})
+
+    app = Application()
+    app.router.add_get("/fact", handler)
+    app.router.add_get("/slow", slow_handler)
+
+    async def catalog_handler(request):
+        return json_response(
+            {"items": [{"name": "Tuna", "price": 3}] * 500, "total": 500},
+            headers={"X-Request-Id": "abc"},
+        )
+
+    app.router.add_get("/catalog", catalog_handler)
+
+    async def flaky_handler(request):
+        peers.append(request.transport.get_extra_info("peername"))
+        if len(peers) < 3:
+            return json_response({"error": "unavailable"}, status=503)
+        return json_response({"fact": "Cats sleep a lot"})
+
+    async def straggler_handler(request):
+        peers.append(request.transport.get_extra_info("peername"))
+        if len(peers) == 1:
+            await asyncio.sleep(1)
+        return json_response({"request": len(peers)})
+
+    async def down_handler(request):
+        peers.append(request.transport.get_extra_info("peername"))
+        return json_response({"error": "down"}, status=500)
+
+    app.router.add_get("/flaky", flaky_handler)
+    app.router.add_get("/down", down_handler)
+    app.router.add_get("/straggler", straggler_handler)
+    server = await aiohttp_server(app)
+    server.peers = peers
+    return server
+
+
+def make_action(server, **kwargs) -> CustomAction:
+    return CustomAction(
+        id="get_fact",
+        name="Get Fact",
+        description="Fetch a fact",
+        method=HttpMethod.GET,
+        url=f"http://{server.host}:{server.port}/fact",
+        store_response_as="fact",
+        **kwargs,
+    )
+
+
+def test_http_pool_is_not_capped_by_default():
+    config = HttpPoolConfig()
+
+    assert (config.limit, config.limit_per_host) == (0, 0)
+    assert HttpClientPool(config).stats().utilization == 0.0
+
+
+async def test_executors_share_pooled_connections(server, http_pool):
+    action = make_action(server)
+    first = ActionExecutor([action], http_pool=http_pool)
+    second = ActionExecutor([action], http_pool=http_pool)
+
+    result = await first.execute_action("get_fact")
+    await second.execute_action("get_fact")
+
+    assert result["success"]
+    assert result["data"] == {"fact": "Cats sleep a lot"}
+    assert first.action_results["fact"] == result
+    assert server.peers[0] == server.peers[1]
+
+    stats = http_pool.stats()
+    assert stats.sessions_created == 1
+    assert stats.total_requests == 2
+    assert stats.in_flight == 0
+    assert stats.limit_per_host == 2
+
+
+async def test_cached_action_is_served_from_cache(server, http_pool):
+    clear_response_caches()
+    action = make_action(server, cache=ActionCacheConfig(ttl=60))
+    first = ActionExecutor([action], http_pool=http_pool)
+    second = ActionExecutor([action], http_pool=http_pool)
+
+    result = await first.execute_action("get_fact")
+    cached = await second.execute_action("get_fact")
+
+    assert cached == result
+    assert cached is not result
+    assert len(server.peers) == 1
+
+    stats = get_response_cache("get_fact").stats()
+    assert stats.hits == 1
+    assert stats.misses == 1
+
+
+async def test_cached_responses_vary_on_request_headers(server, http_pool):
+    clear_response_caches()
+    action = make_action(
+        server,
+        cache=ActionCacheConfig(ttl=60),
+        headers={"Authorization": "Bearer {{ userdata.token }}"},
+    )
+
+    class User(BaseModel):
+        token: str
+
+    for token in ("ann", "bob", "ann"):
+        executor = ActionExecutor([action], http_pool=http_pool)
+        await executor.execute_action("get_fact", User(token=token))
+
+    assert len(server.peers) == 2
+    assert get_response_cache("get_fact").stats().hits == 1
+
+
+async def test_stale_cached_action_is_revalidated_with_etag(server, http_pool):
+    clear_response_caches()
+    action = make_action(server, cache=ActionCacheConfig(ttl=60))
+    executor = ActionExecutor([action], http_pool=http_pool)
+
+    result = await executor.execute_action("get_fact")
+    cache = get_response_cache("get_fact")
+    for entry in cache._entries.values():
+        entry.expires_at = 0
+
+    revalidated = await executor.execute_action("get_fact")
+
+    assert revalidated == result
+    assert len(server.peers) == 2
+    assert cache.stats().revalidations == 1
+
+
+async def test_concurrent_identical_requests_are_coalesced(server, http_pool):
+    action = make_action(server, coalesce=True)
+    action.url = f"http://{server.host}:{server.port}/slow"
+    executors = [ActionExecutor([action], http_pool=http_pool) for _ in range(5)]
+    followers_before = get_single_flight().stats().followers
+
+    results = await asyncio.gather(*(e.execute_action("get_fact") for e in executors))
+
+    assert len(server.peers) == 1
+    assert all(r == results[0] for r in results)
+    assert len({id(e.action_results["fact"]) for e in executors}) == 5
+    assert get_single_flight().stats().followers - followers_before == 4
+
+
+class Userdata(BaseModel):
+    topic: str | None = None
+
+
+async def test_prefetched_action_is_used_on_entry(server, http_pool):
+    action = make_action(server, prefetch=True)
+    action.url += "?topic={{ userdata.topic }}"
+    executor = ActionExecutor([action], http_pool=http_pool)
+    before = prefetch_stats()
+
+    assert executor.prefetch_action("get_fact", Userdata(topic="cats"))
+    assert not executor.prefetch_action("get_fact", Userdata(topic="cats"))
+    result = await executor.execute_action("get_fact", Userdata(topic="cats"))
+
+    assert result["success"]
+    assert len(server.peers) == 1
+    assert prefetch_stats().hits == before.hits + 1
+
+
+async def test_stale_and_unused_prefetches_are_discarded(server, http_pool):
+    action = make_action(server, prefetch=True)
+    action.url += "?topic={{ userdata.topic }}"
+    executor = ActionExecutor([action], http_pool=http_pool)
+    before = prefetch_stats()
+
+    executor.prefetch_action("get_fact", Userdata(topic="cats"))
+    await executor.execute_action("get_fact", Userdata(topic="dogs"))
+    executor.prefetch_action("get_fact", Userdata(topic="cats"))
+    executor.discard_prefetches()
+
+    stats = prefetch_stats()
+    assert stats.stale == before.stale + 1
+    assert stats.discarded == before.discarded + 1
+    assert executor._prefetched == {}
+
+
+def test_only_get_actions_can_be_prefetched():
+    with pytest.raises(ValidationError, match="only GET actions can be prefetched"):
+        CustomAction(
+            id="create",
+            name="Create",
+            description="Create",
+            method=HttpMethod.POST,
+            url="https://example.com",
+            prefetch=True,
+        )
+
+
+async def test_response_projection_and_header_allow_list(server, http_pool):
+    action = make_action(
+        server,
+        extract={"first": "$.items[0].name", "total": "total", "missing": "a.b"},
+        response_headers=["x-request-id"],
+    )
+    action.url = f"http://{server.host}:{server.port}/catalog"
+    executor = ActionExecutor([action], http_pool=http_pool)
+
+    result = await executor.execute_action("get_fact")
+
+    assert result["data"] == {"first": "Tuna", "total": 500, "missing": None}
+    assert {k.lower(): v for k, v in result["headers"].items()} == {
+        "x-request-id": "abc"
+    }
+
+
+async def test_response_over_the_size_limit_fails(server, http_pool):
+    action = make_action(server, max_response_bytes=1024)
+    action.url = f"http://{server.host}:{server.port}/catalog"
+    executor = ActionExecutor([action], http_pool=http_pool)
+
+    result = await executor.execute_action("get_fact")
+
+    assert not result["success"]
+    assert "exceeds 1024 bytes" in result["error"]
+
+
+async def test_retries_with_backoff_until_success(server, http_pool):
+    clear_latency_trackers()
+    action = make_action(server, retry=RetryPolicy(max_attempts=3, base_delay=0.01))
+    action.url = f"http://{server.host}:{server.port}/flaky"
+    executor = ActionExecutor([action], http_pool=http_pool)
+
+    result = await executor.execute_action("get_fact")
+
+    assert result["success"]
+    assert len(server.peers) == 3
+    assert get_latency_tracker("get_fact").stats().retries == 2
+
+
+async def test_retries_stop_at_the_node_deadline(server, http_pool):
+    clear_latency_trackers()
+    action = make_action(server, retry=RetryPolicy(max_attempts=3, base_delay=0.01))
+    action.url = f"http://{server.host}:{server.port}/flaky"
+    executor = ActionExecutor([action], http_pool=http_pool)
+    deadline = asyncio.get_running_loop().time()
+
+    result = await executor.execute_action("get_fact", deadline=deadline)
+
+    assert result["status"] == 503
+    assert len(server.peers) == 1
+
+
+async def test_adaptive_timeout_recovers_after_latency_shift(server, http_pool):
+    clear_latency_trackers()
+    tracker = get_latency_tracker("get_fact")
+    for _ in range(20):
+        tracker.record(0.02)
+    action = make_action(server, latency=LatencyPolicy(min_timeout=0.01))
+    action.url = f"http://{server.host}:{server.port}/slow"
+    executor = ActionExecutor([action], http_pool=http_pool)
+
+    first = await executor.execute_action("get_fact")
+    second = await executor.execute_action("get_fact")
+
+    assert first["status"] == 500
+    assert second["success"]
+    stats = tracker.stats()
+    assert stats.timeouts == 1
+    assert stats.samples == 22
+
+
+async def test_slow_request_is_hedged_after_p95(server, http_pool):
+    clear_latency_trackers()
+    tracker = get_latency_tracker("get_fact")
+    for _ in range(5):
+        tracker.record(0.02)
+    action = make_action(server, latency=LatencyPolicy(hedge=True, min_samples=5))
+    action.url = f"http://{server.host}:{server.port}/straggler"
+    executor = ActionExecutor([action], http_pool=http_pool)
+
+    result = await executor.execute_action("get_fact")
+
+    assert result["data"] == {"request": 2}
+    stats = tracker.stats()
+    assert stats.hedges == 1
+    assert stats.hedge_wins == 1
+    # The hedge's sample plus the losing primary's elapsed time
+    assert stats.samples == 7
+    assert stats.p99 > 0.02
+
+
+async def test_cancelled_caller_does_not_orphan_the_primary(server, http_pool):
+    clear_latency_trackers()
+    tracker = get_latency_tracker("get_fact")
+    for _ in range(5):
+        tracker.record(0.5)
+    action = make_action(server, latency=LatencyPolicy(hedge=True, min_samples=5))
+    action.url = f"http://{server.host}:{server.port}/straggler"
+    executor = ActionExecutor([action], http_pool=http_pool)
+
+    call = asyncio.ensure_future(executor.execute_action("get_fact"))
+    await asyncio.sleep(0.05)
+    call.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await call
+    await asyncio.sleep(0)
+
+    assert http_pool.stats().in_flight == 0
+
+
+async def test_open_circuit_fails_fast_with_fallback(server, http_pool):
+    clear_circuit_breakers()
+    config = CircuitBreakerConfig(min_calls=2, window=4, open_seconds=60)
+    action = make_action(
+        server,
+        circuit_breaker=config,
+        fallback_result={"data": {"fact": "Cats are great"}},
+    )
+    action.url = f"http://{server.host}:{server.port}/down"
+    executor = ActionExecutor([action], http_pool=http_pool)
+
+    await executor.execute_action("get_fact")
+    await executor.execute_action("get_fact")
+    result = await executor.execute_action("get_fact")
+
+    assert len(server.peers) == 2
+    assert result["success"] is False
+    assert result["status"] == 503
+    assert result["data"] == {"fact": "Cats are great"}
+    assert executor.action_results["fact"] == result
+
+    breaker = get_circuit_breaker(f"host:{server.host}:{server.port}", config)
+    assert breaker.stats().state == CircuitState.OPEN
+    assert breaker.stats().rejected == 1
+
+
+async def test_circuit_half_opens_after_cool_down():
+    breaker = CircuitBreaker(CircuitBreakerConfig(min_calls=1, open_seconds=0.01))
+
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    await asyncio.sleep(0.02)
+    assert breaker.allow()
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.allow()
+
+
+def test_breakers_are_kept_per_config():
+    clear_circuit_breakers()
+    strict = CircuitBreakerConfig(min_calls=2)
+    lenient = CircuitBreakerConfig(min_calls=10)
+
+    for _ in range(2):
+        get_circuit_breaker("host:api", strict).record_failure()
+        get_circuit_breaker("host:api", lenient).record_failure()
+
+    assert get_circuit_breaker("host:api", strict).state == CircuitState.OPEN
+    assert get_circuit_breaker("host:api", lenient).state == CircuitState.CLOSED
+
+
+async def test_cancelled_half_open_probe_releases_its_slot(server, http_pool):
+    clear_circuit_breakers()
+    config = CircuitBreakerConfig(min_calls=1, open_seconds=0.01)
+    action = make_action(server, circuit_breaker=config)
+    action.url = f"http://{server.host}:{server.port}/slow"
+    executor = ActionExecutor([action], http_pool=http_pool)
+    breaker = get_circuit_breaker(f"host:{server.host}:{server.port}", config)
+    breaker.record_failure()
+    await asyncio.sleep(0.02)
+
+    probe = asyncio.ensure_future(executor.execute_action("get_fact"))
+    await asyncio.sleep(0.01)
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+
+    assert breaker.state == CircuitState.HALF_OPEN
+    result = await executor.execute_action("get_fact")
+    assert result["success"]
+    assert breaker.state == CircuitState.CLOSED
+
+
+async def test_concurrency_limit_is_shared_across_sessions(server, http_pool):
+    clear_rate_limiters()
+    action = make_action(
+        server, rate_limits=[RateLimitConfig(scope="host", max_concurrency=1)]
+    )
+    action.url = f"http://{server.host}:{server.port}/slow"
+    executors = [ActionExecutor([action], http_pool=http_pool) for _ in range(3)]
+
+    results = await asyncio.gather(*(e.execute_action("get_fact") for e in executors))
+
+    assert all(result["success"] for result in results)
+    stats = rate_limiter_stats()[f"host:{server.host}:{server.port}"]
+    assert stats.acquired == 3
+    assert stats.queued == 2
+    assert stats.max_wait >= 0.09
+    assert stats.in_flight == 0
+
+
+async def test_rate_limit_fails_fast_with_fallback(server, http_pool):
+    clear_rate_limiters()
+    action = make_action(
+        server,
+        rate_limits=[RateLimitConfig(rate=1, burst=1, on_limit="fail")],
+        fallback_result={"data": {"fact": "Cats are great"}},
+    )
+    executor = ActionExecutor([action], http_pool=http_pool)
+
+    first = await executor.execute_action("get_fact")
+    second = await executor.execute_action("get_fact")
+
+    assert first["success"]
+    assert second["status"] == 429
+    assert second["data"] == {"fact": "Cats are great"}
+    assert len(server.peers) == 1
+    assert rate_limiter_stats()["action:get_fact"].rejected == 1
+
+
+async def test_action_state_is_kept_per_flow(server, http_pool):
+    clear_rate_limiters()
+    clear_latency_trackers()
+    limits = [RateLimitConfig(rate=1, burst=1, on_limit="fail")]
+    action = make_action(server, rate_limits=limits)
+    first = ActionExecutor([action], http_pool=http_pool, namespace="first")
+    second = ActionExecutor([action], http_pool=http_pool, namespace="second")
+
+    assert (await first.execute_action("get_fact"))["success"]
+    assert (await second.execute_action("get_fact"))["success"]
+
+    stats = rate_limiter_stats()
+    assert stats["action:first/get_fact"].acquired == 1
+    assert stats["action:second/get_fact"].acquired == 1
+    assert get_latency_tracker("first/get_fact").stats().samples == 1
+
+
+async def test_changed_limits_get_their_own_limiter(server, http_pool):
+    clear_rate_limiters()
+    action = make_action(
+        server, rate_limits=[RateLimitConfig(rate=1, burst=1, on_limit="fail")]
+    )
+    executor = ActionExecutor([action], http_pool=http_pool)
+    await executor.execute_action("get_fact")
+
+    reloaded = make_action(
+        server, rate_limits=[RateLimitConfig(rate=10, burst=5, on_limit="fail")]
+    )
+    executor = ActionExecutor([reloaded], http_pool=http_pool)
+    results = [await executor.execute_action("get_fact") for _ in range(3)]
+
+    assert all(result["success"] for result in results)
+    acquired = sorted(s.acquired for s in rate_limiter_stats().values())
+    assert acquired == [1, 3]
+
+
+async def test_host_limits_with_different_configs_do_not_reset(server, http_pool):
+    clear_rate_limiters()
+    url = f"http://{server.host}:{server.port}/slow"
+    actions = [
+        CustomAction(
+            id=f"lookup_{limit}",
+            name="Lookup",
+            description="Lookup",
+            method=HttpMethod.GET,
+            url=url,
+            rate_limits=[RateLimitConfig(scope="host", max_concurrency=limit)],
+        )
+        for limit in (1, 2)
+    ]
+    executor = ActionExecutor(actions, http_pool=http_pool)
+
+    await asyncio.gather(
+        *(
+            executor.execute_action(f"lookup_{limit}")
+            for _ in range(4)
+            for limit in (1, 2)
+        )
+    )
+
+    stats = rate_limiter_stats()
+    assert len(stats) == 2
+    assert all(
+        label.startswith(f"host:{server.host}:{server.port}@") for label in stats
+    )
+    assert sorted(s.queued for s in stats.values()) == [2, 3]
+    assert sorted(s.acquired for s in stats.values()) == [4, 4]
+
+
+def test_response_cache_follows_max_entries():
+    clear_response_caches()
+    cache = get_response_cache("resized", max_entries=3)
+    for key in "abc":
+        cache.store(key, {"success": True}, ttl=60)
+
+    assert get_response_cache("resized", max_entries=2) is cache
+    assert cache.stats().size == 2
+    assert cache.stats().max_entries == 2
+
+
+def test_rate_limit_needs_a_limit():
+    with pytest.raises(ValidationError):
+        RateLimitConfig(on_limit="fail")
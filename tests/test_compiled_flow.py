@@ -0,0 +1,178 @@
+import gc
+import weakref
+
+import pytest
+from livekit_flows import (
+    ActionTrigger,
+    ActionTriggerType,
+    CompiledFlow,
+    ConversationFlow,
+    CustomAction,
+    Edge,
+    FlowAgent,
+    FlowNode,
+    HttpMethod,
+    compile_flow,
+)
+
+
+flow = ConversationFlow(
+    system_prompt="Test flow",
+    initial_node="start",
+    nodes=[
+        FlowNode(
+            id="start",
+            name="Start",
+            instruction="Hello {{ userdata.name }}",
+            edges=[
+                Edge(
+                    condition="Got name",
+                    id="collect_name",
+                    target_node_id="end",
+                    input_schema={
+                        "type": "object",
+                        "properties": {"name": {"type": "string"}},
+                        "required": ["name"],
+                    },
+                ),
+                Edge(condition="Skip", id="skip", target_node_id="end"),
+            ],
+            actions=[
+                ActionTrigger(action_id="a", trigger_type=ActionTriggerType.ON_ENTER),
+                ActionTrigger(action_id="b", trigger_type=ActionTriggerType.ON_EXIT),
+            ],
+        ),
+        FlowNode(id="end", name="End", static_text="Bye", is_final=True),
+    ],
+)
+
+
+def test_compiled_flow_indexes():
+    compiled = CompiledFlow.compile(flow)
+
+    assert compiled.initial_node.id == "start"
+    assert compiled.get_node("end").node is flow.nodes[1]
+    assert compiled.get_node("missing") is None
+
+    start = compiled.nodes["start"]
+    assert [a.action_id for a in start.on_enter_actions] == ["a"]
+    assert [a.action_id for a in start.on_exit_actions] == ["b"]
+    assert start.get_edge("skip").description == "Transition to end when skip"
+    assert start.get_edge("collect_name").validator is not None
+    assert start.get_edge("collect_name").tool_schema["name"] == "collect_name"
+    assert "name" in compiled.userdata_class.model_fields
+
+    with pytest.raises(TypeError):
+        compiled.nodes["other"] = start
+
+
+def test_compile_flow_is_shared():
+    assert compile_flow(flow) is compile_flow(flow)
+
+    first = FlowAgent(flow=flow)
+    second = FlowAgent(flow=flow)
+    assert first._compiled_flow is second._compiled_flow
+    assert first._userdata_class is second._userdata_class
+
+
+def test_compiled_form_is_freed_with_the_flow():
+    flows = [flow.model_copy(deep=True) for _ in range(3)]
+    refs = [weakref.ref(f) for f in flows]
+    for f in flows:
+        assert compile_flow(f).flow is f
+    del flows, f
+    gc.collect()
+
+    assert all(ref() is None for ref in refs)
+
+
+def test_assigning_a_field_recompiles():
+    changed = flow.model_copy(deep=True)
+    before = compile_flow(changed)
+    changed.system_prompt = "Changed"
+
+    assert compile_flow(changed) is not before
+    assert changed == changed.model_copy(deep=True)
+    assert compile_flow(changed).flow.system_prompt == "Changed"
+
+
+def test_flow_agent_accepts_compiled_flow():
+    compiled = compile_flow(flow)
+    agent = FlowAgent(compiled, flow.nodes[1])
+
+    assert agent._flow is flow
+    assert agent._current_node.id == "end"
+    assert agent.instructions == "Test flow"
+
+
+def _dependent_flow(**urls: str) -> ConversationFlow:
+    return ConversationFlow(
+        system_prompt="Test",
+        initial_node="start",
+        actions=[
+            CustomAction(
+                id=action_id,
+                name=action_id,
+                description=action_id,
+                method=HttpMethod.GET,
+                url=url,
+                store_response_as=action_id,
+            )
+            for action_id, url in urls.items()
+        ],
+        nodes=[
+            FlowNode(
+                id="start",
+                name="Start",
+                instruction="Hi",
+                actions=[
+                    ActionTrigger(action_id=a, trigger_type=ActionTriggerType.ON_ENTER)
+                    for a in urls
+                ],
+            )
+        ],
+    )
+
+
+def test_action_dependencies_are_inferred_from_templates():
+    compiled = CompiledFlow.compile(
+        _dependent_flow(
+            user="https://example.com/user",
+            orders="https://example.com/orders/{{ actions.user.data.id }}",
+            weather="https://example.com/weather",
+        )
+    )
+
+    dependencies = compiled.nodes["start"].dependencies_for(ActionTriggerType.ON_ENTER)
+    assert dependencies == {
+        "user": frozenset(),
+        "orders": frozenset({"user"}),
+        "weather": frozenset(),
+    }
+
+
+def test_action_dependency_cycle_is_rejected_on_load():
+    with pytest.raises(ValueError, match="Node start: .*cycle: a -> b -> a"):
+        _dependent_flow(
+            a="https://example.com/{{ actions.b.data }}",
+            b="https://example.com/{{ actions.a.data }}",
+        )
+
+    yaml = """
+system_prompt: Test
+initial_node: start
+actions:
+  - {id: a, name: a, description: a, method: GET, store_response_as: a,
+     url: "https://example.com/{{ actions.b.data }}"}
+  - {id: b, name: b, description: b, method: GET, store_response_as: b,
+     url: "https://example.com/{{ actions.a.data }}"}
+nodes:
+  - id: start
+    name: Start
+    instruction: Hi
+    actions:
+      - {action_id: a, trigger_type: on_enter}
+      - {action_id: b, trigger_type: on_enter}
+"""
+    with pytest.raises(ValueError, match="cycle"):
+        ConversationFlow.from_yaml_string(yaml)
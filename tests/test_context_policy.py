@@ -0,0 +1,153 @@
+from types import SimpleNamespace
+from unittest.mock import PropertyMock, patch
+
+import pytest
+from livekit.agents import ChatContext
+from livekit.agents.llm import FunctionCall, FunctionCallOutput
+from pydantic import BaseModel
+from livekit_flows import ConversationFlow, Edge, FlowAgent, FlowNode
+from livekit_flows.compiler import compile_flow
+from livekit_flows.core import ContextPolicy
+from livekit_flows.agent import (
+    clear_context_stats,
+    compact_chat_context,
+    context_stats,
+    estimate_tokens,
+)
+
+
+class Userdata(BaseModel):
+    name: str | None = None
+    phone: str | None = None
+
+
+@pytest.fixture(autouse=True)
+def _clear_stats():
+    clear_context_stats()
+    yield
+    clear_context_stats()
+
+
+def make_chat_ctx() -> ChatContext:
+    chat_ctx = ChatContext()
+    chat_ctx.add_message(role="system", content="Be helpful")
+    for turn in range(3):
+        chat_ctx.add_message(role="user", content=f"question {turn}")
+        chat_ctx.items.append(
+            FunctionCall(call_id=f"c{turn}", name="lookup", arguments="{}")
+        )
+        chat_ctx.items.append(
+            FunctionCallOutput(call_id=f"c{turn}", output="result", is_error=False)
+        )
+        chat_ctx.add_message(role="assistant", content=f"answer {turn}")
+    return chat_ctx
+
+
+def texts(chat_ctx: ChatContext) -> list[str]:
+    return [
+        item.text_content if item.type == "message" else item.type
+        for item in chat_ctx.items
+    ]
+
+
+def test_max_turns_keeps_recent_turns_and_system_messages():
+    compacted = compact_chat_context(make_chat_ctx(), ContextPolicy(max_turns=1))
+
+    assert texts(compacted) == [
+        "Be helpful",
+        "question 2",
+        "function_call",
+        "function_call_output",
+        "answer 2",
+    ]
+
+
+def test_drop_tool_calls_and_summarize_userdata():
+    policy = ContextPolicy(max_turns=2, drop_tool_calls=True, summarize_userdata=True)
+    compacted = compact_chat_context(make_chat_ctx(), policy, Userdata(name="Ann"))
+
+    assert texts(compacted) == [
+        "Be helpful",
+        'Information collected earlier in the conversation: {"name": "Ann"}',
+        "question 1",
+        "answer 1",
+        "question 2",
+        "answer 2",
+    ]
+
+
+def test_fresh_context_starts_empty():
+    chat_ctx = make_chat_ctx()
+
+    assert texts(compact_chat_context(chat_ctx, ContextPolicy(fresh=True))) == []
+    assert len(chat_ctx.items) == 13
+    assert estimate_tokens(chat_ctx) > 0
+
+
+async def test_handoff_compacts_context_and_records_stats():
+    flow = ConversationFlow(
+        system_prompt="Test",
+        initial_node="start",
+        settings={"tool_handoff": True, "context_policy": {"max_turns": 1}},
+        nodes=[
+            FlowNode(
+                id="start",
+                name="Start",
+                static_text="Hi",
+                edges=[Edge(condition="Done", id="done", target_node_id="end")],
+            ),
+            FlowNode(
+                id="end",
+                name="End",
+                static_text="Bye",
+                context_policy=ContextPolicy(fresh=True),
+            ),
+            FlowNode(id="other", name="Other", static_text="Hm"),
+        ],
+    )
+    session = SimpleNamespace(userdata=None)
+    with patch.object(
+        FlowAgent, "session", new_callable=PropertyMock, return_value=session
+    ):
+        agent = FlowAgent(flow, chat_ctx=make_chat_ctx())
+        end_agent = await agent.handle_transition("end", "done")
+        other_agent = await agent.handle_transition("other", "done")
+
+    assert end_agent.chat_ctx.items == []
+    assert texts(other_agent.chat_ctx)[:2] == ["Be helpful", "question 2"]
+    namespace = compile_flow(flow).namespace
+    stats = context_stats()
+    assert stats[f"{namespace}/end"].transitions == 1
+    assert stats[f"{namespace}/end"].tokens_after == 0
+    other = stats[f"{namespace}/other"]
+    assert 0 < other.tokens_after < other.tokens_before
+
+
+async def test_context_stats_are_kept_per_flow():
+    flows = [
+        ConversationFlow(
+            system_prompt="Test",
+            initial_node="start",
+            settings={"tool_handoff": True},
+            nodes=[
+                FlowNode(
+                    id="start",
+                    name="Start",
+                    static_text="Hi",
+                    edges=[Edge(condition="Done", id="done", target_node_id="end")],
+                ),
+                FlowNode(id="end", name="End", static_text="Bye"),
+            ],
+        )
+        for _ in range(2)
+    ]
+    session = SimpleNamespace(userdata=None)
+    with patch.object(
+        FlowAgent, "session", new_callable=PropertyMock, return_value=session
+    ):
+        for flow in flows:
+            await FlowAgent(flow).handle_transition("end", "done")
+
+    stats = context_stats()
+    for flow in flows:
+        assert stats[f"{compile_flow(flow).namespace}/end"].transitions == 1
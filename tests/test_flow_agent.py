@@ -0,0 +1,333 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import PropertyMock, patch
+
+import pytest
+from livekit_flows import (
+    ActionTrigger,
+    ActionTriggerType,
+    ConversationFlow,
+    CustomAction,
+    Edge,
+    FlowAgent,
+    FlowNode,
+    HttpMethod,
+)
+from livekit_flows.actions import ActionExecutor, prefetch_stats
+
+
+def make_action(action_id: str, **kwargs) -> CustomAction:
+    kwargs.setdefault("url", f"https://example.com/{action_id}")
+    return CustomAction(
+        id=action_id,
+        name=action_id,
+        description=action_id,
+        method=HttpMethod.GET,
+        store_response_as=action_id,
+        **kwargs,
+    )
+
+
+class FakeSession:
+    def __init__(self):
+        self.userdata = None
+        self.spoken = []
+
+    def say(self, text):
+        self.spoken.append(("say", text))
+
+    def generate_reply(self, instructions):
+        self.spoken.append(("reply", instructions))
+
+
+class SlowExecutor(ActionExecutor):
+    def __init__(self, actions, delays):
+        super().__init__(actions)
+        self.delays = delays
+        self.finished = []
+
+    async def execute_action(self, action_id, userdata=None, deadline=None):
+        await asyncio.sleep(self.delays.get(action_id, 0))
+        self.finished.append(action_id)
+        self.action_results[action_id] = {"success": True, "data": action_id}
+        return self.action_results[action_id]
+
+
+@pytest.fixture
+def fake_session():
+    session = FakeSession()
+    with patch.object(
+        FlowAgent, "session", new_callable=PropertyMock, return_value=session
+    ):
+        yield session
+
+
+def on_enter(*action_ids: str) -> list[ActionTrigger]:
+    return [
+        ActionTrigger(action_id=a, trigger_type=ActionTriggerType.ON_ENTER)
+        for a in action_ids
+    ]
+
+
+async def test_non_blocking_actions_run_in_background(fake_session):
+    actions = [
+        make_action("profile", blocking=False),
+        make_action("audit", blocking=False),
+    ]
+    flow = ConversationFlow(
+        system_prompt="Test",
+        initial_node="start",
+        actions=actions,
+        nodes=[
+            FlowNode(
+                id="start",
+                name="Start",
+                instruction="Hi {{ actions.profile.data }}",
+                filler_text="One moment",
+                actions=on_enter("profile", "audit"),
+            )
+        ],
+    )
+    executor = SlowExecutor(actions, {"profile": 0.01, "audit": 0.2})
+    agent = FlowAgent(flow, action_executor=executor)
+
+    await agent.on_enter()
+
+    assert executor.finished == ["profile"]
+    assert fake_session.spoken == [("say", "One moment"), ("reply", "Hi profile")]
+    await asyncio.gather(*executor._background_tasks)
+    assert executor.finished == ["profile", "audit"]
+
+
+async def test_referenced_actions_respect_the_deadline(fake_session):
+    actions = [make_action("slow")]
+    flow = ConversationFlow(
+        system_prompt="Test",
+        initial_node="start",
+        actions=actions,
+        nodes=[
+            FlowNode(
+                id="start",
+                name="Start",
+                static_text="Done",
+                action_deadline=0.01,
+                actions=on_enter("slow"),
+            )
+        ],
+    )
+    executor = SlowExecutor(actions, {"slow": 0.2})
+    agent = FlowAgent(flow, action_executor=executor)
+
+    await agent.on_enter()
+
+    assert executor.finished == []
+    assert fake_session.spoken == [("say", "Done")]
+    assert len(executor._background_tasks) == 1
+    await asyncio.gather(*executor._background_tasks)
+
+
+async def test_dependent_actions_run_after_their_inputs(fake_session):
+    actions = [
+        make_action("user"),
+        make_action("orders", url="https://example.com/orders/{{ actions.user.data }}"),
+        make_action("weather"),
+    ]
+    flow = ConversationFlow(
+        system_prompt="Test",
+        initial_node="start",
+        actions=actions,
+        nodes=[
+            FlowNode(
+                id="start",
+                name="Start",
+                static_text="Done",
+                actions=on_enter("orders", "user", "weather"),
+            )
+        ],
+    )
+    executor = SlowExecutor(actions, {"user": 0.05, "weather": 0.02})
+    agent = FlowAgent(flow, action_executor=executor)
+
+    await agent.on_enter()
+
+    assert executor.finished == ["weather", "user", "orders"]
+
+
+def test_sessions_share_flow_state():
+    flow = ConversationFlow(
+        system_prompt="Test",
+        initial_node="start",
+        actions=[make_action("profile")],
+        nodes=[FlowNode(id="start", name="Start", static_text="Hi")],
+    )
+    first = FlowAgent(flow)
+    second = FlowAgent(flow)
+
+    assert first._action_executor is not second._action_executor
+    assert first._action_executor.actions is second._action_executor.actions
+    assert (
+        first._action_executor.template_renderer
+        is second._action_executor.template_renderer
+    )
+    assert not hasattr(first._action_executor, "__dict__")
+
+
+async def test_in_place_transition_keeps_the_agent(fake_session):
+    actions = [make_action("farewell")]
+    flow = ConversationFlow(
+        system_prompt="Test",
+        initial_node="start",
+        actions=actions,
+        settings={"transition_mode": "in_place"},
+        nodes=[
+            FlowNode(
+                id="start",
+                name="Start",
+                static_text="Hi",
+                edges=[Edge(condition="Done", id="finish", target_node_id="next")],
+            ),
+            FlowNode(
+                id="next",
+                name="Next",
+                static_text="Bye {{ actions.farewell.data }}",
+                actions=on_enter("farewell"),
+                edges=[Edge(condition="Again", id="again", target_node_id="start")],
+            ),
+        ],
+    )
+    executor = SlowExecutor(actions, {})
+    agent = FlowAgent(flow, action_executor=executor)
+
+    # FakeSession has no update_agent, a handoff would fail here
+    await agent.handle_transition("next", "finish")
+
+    assert agent._current_node.id == "next"
+    assert [tool.id for tool in agent.tools] == ["again"]
+    assert executor.finished == ["farewell"]
+    assert fake_session.spoken == [("say", "Bye farewell")]
+
+
+class CountingExecutor(ActionExecutor):
+    def __init__(self, actions):
+        super().__init__(actions)
+        self.requests = []
+
+    async def _execute_request(self, action, request, deadline=None):
+        self.requests.append(action.id)
+        await asyncio.sleep(0.01)
+        return {"success": True, "status": 200, "data": action.id}
+
+
+async def test_background_action_uses_its_prefetch(fake_session):
+    actions = [make_action("profile", blocking=False, prefetch=True)]
+    flow = ConversationFlow(
+        system_prompt="Test",
+        initial_node="start",
+        actions=actions,
+        settings={"transition_mode": "in_place", "prefetch_actions": True},
+        nodes=[
+            FlowNode(
+                id="start",
+                name="Start",
+                static_text="Hi",
+                edges=[Edge(condition="Done", id="finish", target_node_id="next")],
+            ),
+            FlowNode(
+                id="next", name="Next", static_text="Bye", actions=on_enter("profile")
+            ),
+        ],
+    )
+    executor = CountingExecutor(actions)
+    agent = FlowAgent(flow, action_executor=executor)
+    before = prefetch_stats()
+
+    await agent.on_enter()
+    await agent.handle_transition("next", "finish")
+    await asyncio.gather(*executor._background_tasks)
+
+    assert executor.requests == ["profile"]
+    assert executor.action_results["profile"]["data"] == "profile"
+    stats = prefetch_stats()
+    assert stats.hits == before.hits + 1
+    assert stats.discarded == before.discarded
+
+
+async def test_tool_handoff_returns_the_next_agent(fake_session):
+    flow = ConversationFlow(
+        system_prompt="Test",
+        initial_node="start",
+        settings={"tool_handoff": True},
+        nodes=[
+            FlowNode(
+                id="start",
+                name="Start",
+                static_text="Hi",
+                edges=[
+                    Edge(
+                        condition="Got name",
+                        id="collect_name",
+                        target_node_id="end",
+                        input_schema={
+                            "type": "object",
+                            "properties": {"name": {"type": "string"}},
+                        },
+                    )
+                ],
+            ),
+            FlowNode(id="end", name="End", static_text="Bye {{ userdata.name }}"),
+        ],
+    )
+    agent = FlowAgent(flow)
+    context = SimpleNamespace(session=SimpleNamespace(current_agent=agent))
+    (collect,) = agent.tools
+
+    # FakeSession has no update_agent, the framework does the handoff
+    next_agent = await collect({"name": "Ann"}, context)
+
+    assert isinstance(next_agent, FlowAgent)
+    assert next_agent._current_node.id == "end"
+    assert fake_session.userdata.name == "Ann"
+
+
+async def test_tool_calls_for_edges_of_a_previous_node_are_ignored(fake_session):
+    flow = ConversationFlow(
+        system_prompt="Test",
+        initial_node="start",
+        settings={"transition_mode": "in_place"},
+        nodes=[
+            FlowNode(
+                id="start",
+                name="Start",
+                static_text="Hi",
+                edges=[
+                    Edge(condition="Done", id="finish", target_node_id="next"),
+                    Edge(
+                        condition="Got name",
+                        id="collect_name",
+                        target_node_id="next",
+                        input_schema={
+                            "type": "object",
+                            "properties": {"name": {"type": "string"}},
+                        },
+                    ),
+                ],
+            ),
+            FlowNode(
+                id="next",
+                name="Next",
+                static_text="Bye",
+                edges=[Edge(condition="Again", id="again", target_node_id="start")],
+            ),
+        ],
+    )
+    agent = FlowAgent(flow)
+    context = SimpleNamespace(session=SimpleNamespace(current_agent=agent))
+    finish, collect = agent.tools
+
+    await finish(context)
+    assert await finish(context) is None
+    assert await collect({"name": "Ann"}, context) is None
+
+    assert agent._current_node.id == "next"
+    assert fake_session.spoken == [("say", "Bye")]
+    assert fake_session.userdata is None
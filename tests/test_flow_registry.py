@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+from livekit_flows import ConversationFlow, FlowNode, FlowRegistry
+
+
+def make_flow(flow_id: str) -> ConversationFlow:
+    return ConversationFlow(
+        system_prompt="You are a helpful receptionist",
+        initial_node="start",
+        nodes=[
+            FlowNode(
+                id="start",
+                name="Start",
+                static_text=f"Welcome to {flow_id}",
+            )
+        ],
+    )
+
+
+class CountingLoader:
+    def __init__(self):
+        self.loads: list[str] = []
+
+    def __call__(self, flow_id: str) -> ConversationFlow:
+        if flow_id == "missing":
+            raise KeyError(flow_id)
+        self.loads.append(flow_id)
+        return make_flow(flow_id)
+
+
+async def test_flows_are_loaded_once_and_shared():
+    loader = CountingLoader()
+    registry = FlowRegistry(loader)
+
+    flows = await asyncio.gather(*(registry.get("acme") for _ in range(5)))
+    again = await registry.get("acme")
+
+    assert loader.loads == ["acme"]
+    assert all(flow is again for flow in flows)
+    assert again.initial_node.node.static_text == "Welcome to acme"
+
+    stats = registry.stats().flows["acme"]
+    assert stats.hits == 1
+    assert stats.misses == 5
+    assert stats.cached
+    assert stats.memory_bytes > 0
+
+
+def test_strings_are_interned_across_flows():
+    registry = FlowRegistry(CountingLoader())
+
+    first = registry.load("acme")
+    second = registry.load("globex")
+
+    assert first.flow.system_prompt is second.flow.system_prompt
+    assert first.flow.nodes[0].id is second.flow.nodes[0].id
+    assert (first.namespace, second.namespace) == ("acme", "globex")
+
+
+def test_least_recently_used_unpinned_flows_are_evicted():
+    loader = CountingLoader()
+    registry = FlowRegistry(loader)
+    registry.load("acme")
+    registry.max_bytes = int(registry.stats().memory_bytes * 2.5)
+    registry.pin("acme")
+
+    registry.load("globex")
+    registry.load("initech")
+
+    assert "acme" in registry
+    assert "globex" not in registry
+    assert "initech" in registry
+    stats = registry.stats()
+    assert stats.evictions == 1
+    assert stats.flows["acme"].pinned
+    assert stats.memory_bytes <= stats.max_bytes
+
+
+def test_flow_ids_are_checked():
+    registry = FlowRegistry(CountingLoader())
+
+    with pytest.raises(KeyError):
+        registry.load("../secrets")
+    with pytest.raises(KeyError):
+        registry.load("missing")
+
+
+def test_registry_from_directory(tmp_path):
+    (tmp_path / "acme.json").write_text(make_flow("acme").model_dump_json())
+    registry = FlowRegistry.from_directory(tmp_path)
+
+    assert registry.load("acme").flow.nodes[0].static_text == "Welcome to acme"
+    with pytest.raises(KeyError):
+        registry.load("globex")
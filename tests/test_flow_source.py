@@ -0,0 +1,80 @@
+import os
+
+from livekit_flows import FlowAgent, FlowSource
+from livekit_flows.agent import get_tool_factory
+
+FLOW_YAML = """
+system_prompt: Test flow
+initial_node: start
+nodes:
+  - id: start
+    name: Start
+    instruction: Ask for the name
+    edges:
+      - condition: Got the name
+        id: collect_name
+        target_node_id: end
+        input_schema:
+          type: object
+          properties:
+            name: {type: string}
+  - id: end
+    name: End
+    static_text: Goodbye
+"""
+
+
+def write_flow(path, content):
+    path.write_text(content)
+    # Make the change visible even on filesystems with coarse mtimes
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_unchanged_file_is_not_reloaded(tmp_path):
+    path = tmp_path / "flow.yaml"
+    write_flow(path, FLOW_YAML)
+    source = FlowSource(path)
+
+    assert source.reload() is None
+    assert source.version == 1
+
+
+def test_reload_recompiles_only_changed_nodes(tmp_path):
+    path = tmp_path / "flow.yaml"
+    write_flow(path, FLOW_YAML)
+    source = FlowSource(path)
+    previous = source.current
+    running = FlowAgent(previous)
+
+    write_flow(path, FLOW_YAML.replace("Goodbye", "See you"))
+    diff = source.reload()
+
+    assert diff.changed_nodes == ("end",)
+    assert source.version == 2
+    current = source.current
+    assert current is not previous
+    assert current.nodes["start"] is previous.nodes["start"]
+    assert current.namespace == previous.namespace
+    assert current.nodes["end"] is not previous.nodes["end"]
+    assert current.nodes["end"].node.static_text == "See you"
+    assert get_tool_factory().tools_for_node(
+        current.nodes["start"]
+    ) == get_tool_factory().tools_for_node(previous.nodes["start"])
+
+    # Sessions started before the reload keep their version
+    assert running._compiled_flow is previous
+    assert FlowAgent(current)._compiled_flow is current
+
+
+def test_invalid_change_keeps_the_running_version(tmp_path):
+    path = tmp_path / "flow.yaml"
+    write_flow(path, FLOW_YAML)
+    source = FlowSource(path)
+    previous = source.current
+
+    write_flow(path, FLOW_YAML.replace("initial_node: start", "initial_node: gone"))
+
+    assert source.reload() is None
+    assert source.current is previous
+    assert source.version == 1
@@ -0,0 +1,49 @@
+import subprocess
+import sys
+
+import pytest
+
+HEAVY_MODULES = {"livekit.agents", "aiohttp", "jinja2", "jsonschema"}
+
+
+def imported_modules(statement: str) -> set[str]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return {
+        line.rsplit("|", 1)[1].strip()
+        for line in result.stderr.splitlines()
+        if line.startswith("import time:")
+    }
+
+
+@pytest.mark.parametrize(
+    "statement",
+    [
+        "import livekit_flows",
+        "from livekit_flows import ConversationFlow, CustomAction",
+        "import livekit_flows; livekit_flows.ConversationFlow.from_yaml_string("
+        "'{system_prompt: s, initial_node: a, nodes: [{id: a, name: a}]}')",
+    ],
+)
+def test_loading_flows_does_not_import_the_runtime(statement):
+    assert not HEAVY_MODULES & imported_modules(statement)
+
+
+def test_runtime_is_imported_on_first_use():
+    modules = imported_modules("from livekit_flows import FlowAgent")
+
+    assert {"livekit.agents", "aiohttp"} <= modules
+
+
+def test_lazy_attributes_resolve_to_the_same_objects():
+    import livekit_flows
+    from livekit_flows.core import ConversationFlow
+
+    assert livekit_flows.ConversationFlow is ConversationFlow
+    assert "FlowAgent" in dir(livekit_flows)
+    with pytest.raises(AttributeError):
+        livekit_flows.Missing
@@ -0,0 +1,82 @@
+import pickle
+
+import pytest
+from pydantic import BaseModel
+from livekit_flows import ConversationFlow
+from livekit_flows.loaders import artifact_key
+
+FLOW_YAML = """
+system_prompt: Test flow
+initial_node: start
+nodes:
+  - id: start
+    name: Start
+    static_text: Hello
+"""
+
+
+@pytest.fixture
+def flow_file(tmp_path):
+    path = tmp_path / "flow.yaml"
+    path.write_text(FLOW_YAML)
+    return path
+
+
+def test_validated_flow_is_loaded_from_cache(flow_file, tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    first = ConversationFlow.from_file(flow_file, cache_dir=cache_dir)
+
+    artifacts = list(cache_dir.glob("*.pickle"))
+    assert [a.stem for a in artifacts] == [
+        artifact_key(ConversationFlow, flow_file.read_bytes())
+    ]
+
+    def fail(*args, **kwargs):
+        raise AssertionError("flow was validated again")
+
+    monkeypatch.setattr(ConversationFlow, "model_validate", fail)
+    second = ConversationFlow.from_file(flow_file, cache_dir=cache_dir)
+    assert second == first
+
+
+def test_changed_flow_gets_a_new_artifact(flow_file, tmp_path):
+    cache_dir = tmp_path / "cache"
+    ConversationFlow.from_file(flow_file, cache_dir=cache_dir)
+
+    flow_file.write_text(FLOW_YAML.replace("Hello", "Welcome"))
+    flow = ConversationFlow.from_file(flow_file, cache_dir=cache_dir)
+
+    assert flow.nodes[0].static_text == "Welcome"
+    assert len(list(cache_dir.glob("*.pickle"))) == 2
+
+
+def test_model_changes_get_a_new_artifact():
+    class Flow(BaseModel):
+        name: str
+
+    old_key = artifact_key(Flow, b"name: test")
+
+    class Flow(BaseModel):  # noqa: F811
+        name: str
+        transition_mode: str = "handoff"
+
+    assert artifact_key(Flow, b"name: test") != old_key
+
+
+def test_unreadable_artifact_is_ignored(flow_file, tmp_path):
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    key = artifact_key(ConversationFlow, flow_file.read_bytes())
+    (cache_dir / f"{key}.pickle").write_bytes(pickle.dumps({"not": "a flow"}))
+
+    flow = ConversationFlow.from_file(flow_file, cache_dir=cache_dir)
+
+    assert flow.nodes[0].static_text == "Hello"
+    assert isinstance(
+        pickle.loads((cache_dir / f"{key}.pickle").read_bytes()), ConversationFlow
+    )
+
+
+def test_invalid_json_is_reported():
+    with pytest.raises(ValueError, match="Invalid JSON content"):
+        ConversationFlow.from_json_string("{not json")
@@ -0,0 +1,37 @@
+from livekit_flows import ConversationFlow, Edge, FlowNode
+from livekit_flows.utils import generate_userdata_class, userdata_schema_hash
+
+
+def make_flow(field_type: str = "string") -> ConversationFlow:
+    return ConversationFlow(
+        system_prompt="Test",
+        initial_node="start",
+        nodes=[
+            FlowNode(
+                id="start",
+                name="Start",
+                edges=[
+                    Edge(
+                        condition="Got value",
+                        id="collect",
+                        input_schema={
+                            "type": "object",
+                            "properties": {"value": {"type": field_type}},
+                            "required": ["value"],
+                        },
+                    )
+                ],
+            )
+        ],
+    )
+
+
+def test_userdata_class_is_memoized_by_schema_content():
+    first = generate_userdata_class(make_flow())
+
+    assert generate_userdata_class(make_flow()) is first
+    assert generate_userdata_class(make_flow("integer")) is not first
+    assert generate_userdata_class(make_flow(), use_cache=False) is not first
+    assert userdata_schema_hash(make_flow()) != userdata_schema_hash(
+        make_flow(), class_name="Other"
+    )
@@ -0,0 +1,74 @@
+import json
+
+from livekit_flows import ConversationFlow, Edge, FlowNode
+from livekit_flows.agent import dump_prompt_prefixes, prompt_prefix
+from livekit_flows.compiler import CompiledFlow
+
+
+def make_flow(layout: str, reordered: bool = False) -> ConversationFlow:
+    properties = {
+        "name": {"type": "string", "description": "Full  name"},
+        "phone": {"type": "string", "description": "Phone number"},
+    }
+    if reordered:
+        properties = {
+            "phone": {"description": "Phone number", "type": "string"},
+            "name": {"description": "Full name\n", "type": "string"},
+        }
+    edges = [
+        Edge(condition="Wants to leave", id="leave", target_node_id="end"),
+        Edge(
+            condition="Caller gave details",
+            id="collect",
+            target_node_id="end",
+            input_schema={"type": "object", "properties": properties},
+        ),
+    ]
+    if reordered:
+        edges.reverse()
+    return ConversationFlow(
+        system_prompt="You are a receptionist",
+        initial_node="start",
+        settings={"prompt_layout": layout},
+        nodes=[
+            FlowNode(id="start", name="Start", instruction="Greet", edges=edges),
+            FlowNode(id="end", name="End", static_text="Bye", is_final=True),
+        ],
+    )
+
+
+def test_cache_friendly_prefix_ignores_authoring_order():
+    first = prompt_prefix(make_flow("cache_friendly"), "start")
+    second = prompt_prefix(make_flow("cache_friendly", reordered=True), "start")
+
+    assert first == second
+    tools = json.loads(first)["tools"]
+    assert [tool.get("name") or tool["function"]["name"] for tool in tools] == [
+        "collect",
+        "leave",
+    ]
+    assert tools[0]["parameters"]["properties"]["name"]["description"] == "Full name"
+
+
+def test_default_prefix_follows_edge_order():
+    first = prompt_prefix(make_flow("default"), "start")
+    second = prompt_prefix(make_flow("default", reordered=True), "start")
+
+    assert first != second
+
+
+def test_dump_writes_one_prefix_per_node(tmp_path):
+    flow = make_flow("cache_friendly")
+
+    hashes = dump_prompt_prefixes(flow, tmp_path)
+
+    assert sorted(hashes) == ["end", "start"]
+    assert (tmp_path / "start.json").read_bytes() == prompt_prefix(flow, "start")
+
+
+def test_layout_change_recompiles_nodes():
+    previous = CompiledFlow.compile(make_flow("default"))
+    compiled = CompiledFlow.compile(make_flow("cache_friendly"), previous)
+
+    assert compiled.nodes["start"] is not previous.nodes["start"]
+    assert list(compiled.nodes["start"].edges) == ["collect", "leave"]
@@ -0,0 +1,74 @@
+import pytest
+from jsonschema import Draft7Validator
+from livekit_flows.utils import (
+    FastObjectValidator,
+    compile_validator,
+    validate_against_schema,
+)
+
+
+simple_schema = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string", "description": "Name"},
+        "age": {"type": "integer"},
+        "score": {"type": "number"},
+        "subscribed": {"type": "boolean"},
+    },
+    "required": ["name"],
+    "additionalProperties": False,
+}
+
+
+def test_simple_schema_uses_fast_validator_and_is_cached():
+    validator = compile_validator(simple_schema)
+
+    assert isinstance(validator, FastObjectValidator)
+    assert compile_validator(dict(simple_schema)) is validator
+
+
+def test_complex_schema_falls_back_to_jsonschema():
+    schema = {
+        "type": "object",
+        "properties": {"age": {"type": "integer", "minimum": 0}},
+    }
+
+    assert isinstance(compile_validator(schema), Draft7Validator)
+
+
+def test_type_list_falls_back_to_jsonschema():
+    schema = {
+        "type": "object",
+        "properties": {"nickname": {"type": ["string", "null"]}},
+    }
+
+    assert isinstance(compile_validator(schema), Draft7Validator)
+    assert validate_against_schema({"nickname": None}, schema) == (True, None)
+    assert not validate_against_schema({"nickname": 1}, schema)[0]
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"name": "Ann"},
+        {"name": "Ann", "age": 3, "score": 1.5, "subscribed": True},
+        {"name": "Ann", "age": 3.0, "score": 2},
+        {},
+        {"name": 1},
+        {"name": "Ann", "age": True},
+        {"name": "Ann", "age": 1.5},
+        {"name": "Ann", "score": False},
+        {"name": "Ann", "extra": 1},
+        {"name": "Ann", "extra": 1, "other": 2},
+    ],
+)
+def test_fast_validator_matches_jsonschema(data):
+    fast_valid, fast_error = validate_against_schema(
+        data, simple_schema, compile_validator(simple_schema)
+    )
+    valid, error = validate_against_schema(
+        data, simple_schema, Draft7Validator(simple_schema)
+    )
+
+    assert fast_valid == valid
+    assert fast_error == error
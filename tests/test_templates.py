@@ -0,0 +1,157 @@
+from livekit_flows import ConversationFlow, FlowNode, CustomAction, HttpMethod
+from pydantic import BaseModel
+from livekit_flows.templates import (
+    TemplateCache,
+    TemplateContext,
+    TemplateRenderer,
+    referenced_keys,
+)
+
+
+def test_template_cache_hits_and_evictions():
+    cache = TemplateCache(maxsize=2)
+
+    first = cache.get("Hello {{ name }}")
+    assert cache.get("Hello {{ name }}") is first
+
+    cache.get("Bye {{ name }}")
+    cache.get("Again {{ name }}")
+
+    stats = cache.stats()
+    assert stats.hits == 1
+    assert stats.misses == 3
+    assert stats.evictions == 1
+    assert stats.size == 2
+    assert "Hello {{ name }}" not in cache
+
+
+def test_renderer_uses_cache_and_falls_back_on_error():
+    renderer = TemplateRenderer(cache=TemplateCache(maxsize=8))
+
+    assert renderer.render("Hi {{ userdata.name }}", {"userdata": {"name": "Ann"}}) == (
+        "Hi Ann"
+    )
+    assert renderer.render("Hi {{ userdata.name }}", {"userdata": {"name": "Bob"}}) == (
+        "Hi Bob"
+    )
+    assert renderer.cache.stats().hits == 1
+    assert renderer.render("{% if %}", {}) == "{% if %}"
+
+
+def test_precompile_flow():
+    flow = ConversationFlow(
+        system_prompt="Test",
+        initial_node="start",
+        actions=[
+            CustomAction(
+                id="fetch",
+                name="Fetch",
+                description="Fetch data",
+                method=HttpMethod.POST,
+                url="https://example.com/{{ env.path }}",
+                headers={"Authorization": "Bearer {{ env.token }}"},
+                body_template='{"name": "{{ userdata.name }}"}',
+            )
+        ],
+        nodes=[
+            FlowNode(
+                id="start",
+                name="Start",
+                instruction="Hello {{ userdata.name }}",
+                static_text="Static",
+            ),
+            FlowNode(id="broken", name="Broken", instruction="{% if %}"),
+        ],
+    )
+    renderer = TemplateRenderer(cache=TemplateCache(maxsize=16))
+
+    assert renderer.precompile_flow(flow) == 5
+    assert "Hello {{ userdata.name }}" in renderer.cache
+    assert "Bearer {{ env.token }}" in renderer.cache
+
+
+def test_referenced_keys():
+    assert referenced_keys(
+        "{% if actions.profile.success %}{{ actions['fact'].data }}{% endif %}",
+        "actions",
+    ) == {"profile", "fact"}
+    assert referenced_keys("{{ userdata.name }}", "actions") == frozenset()
+    assert referenced_keys("{{ actions | tojson }}", "actions") is None
+    assert referenced_keys("{{ actions[key] }}", "actions") is None
+    assert referenced_keys("{{ actions.get('profile') }}", "actions") is None
+    assert referenced_keys("{{ userdata.items }}", "userdata") is None
+
+
+def test_method_calls_on_roots_see_the_full_context():
+    context = TemplateContext(
+        environment_vars={"API_KEY": "k"},
+        action_results={"profile": {"data": 1}},
+    )
+    renderer = TemplateRenderer(cache=TemplateCache(maxsize=8))
+    userdata = Customer(name="Ann")
+
+    def render(template):
+        return renderer.render_in(template, context, userdata)
+
+    assert (
+        render("{% for k, v in userdata.items() %}{{ k }}={{ v }};{% endfor %}")
+        == "name=Ann;address=None;notes=[];"
+    )
+    assert render("{{ env.get('API_KEY', 'none') }}") == "k"
+    assert render("{{ actions.get('profile', {}).get('data') }}") == "1"
+
+
+class Address(BaseModel):
+    city: str
+
+
+class Customer(BaseModel):
+    name: str | None = None
+    address: Address | None = None
+    notes: list[str] = []
+
+
+def test_context_only_carries_referenced_keys():
+    context = TemplateContext(
+        environment_vars={"region": "eu", "token": "secret"},
+        action_results={"profile": {"vip": True}, "orders": {"count": 3}},
+    )
+    userdata = Customer(name="Ann", address=Address(city="Oslo"))
+
+    rendered = context.for_template(
+        "{{ userdata.name }} {{ actions.profile.vip }} {{ env.region }}", userdata
+    )
+
+    assert rendered == {
+        "userdata": {"name": "Ann"},
+        "actions": {"profile": {"vip": True}},
+        "env": {"region": "eu"},
+    }
+    assert context.for_template("{{ userdata | tojson }}", userdata)["userdata"] == (
+        userdata.model_dump()
+    )
+
+
+def test_userdata_snapshot_is_updated_incrementally(monkeypatch):
+    context = TemplateContext()
+    userdata = Customer(name="Ann", address=Address(city="Oslo"))
+    renderer = TemplateRenderer(cache=TemplateCache(maxsize=8))
+    template = "{{ userdata.name }} from {{ userdata.address.city }}"
+
+    assert renderer.render_in(template, context, userdata) == "Ann from Oslo"
+
+    dumps = []
+    original = Customer.model_dump
+
+    def counting_dump(self, **kwargs):
+        dumps.append(kwargs.get("include"))
+        return original(self, **kwargs)
+
+    monkeypatch.setattr(Customer, "model_dump", counting_dump)
+
+    assert renderer.render_in(template, context, userdata) == "Ann from Oslo"
+    assert dumps == []
+
+    context.update_userdata(userdata, {"address": Address(city="Bergen")})
+    assert renderer.render_in(template, context, userdata) == "Ann from Bergen"
+    assert dumps == [{"address"}]
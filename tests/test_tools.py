@@ -0,0 +1,62 @@
+from types import SimpleNamespace
+
+from livekit_flows import ConversationFlow, Edge, FlowAgent, FlowNode, compile_flow
+from livekit_flows.agent import get_tool_factory
+
+
+flow = ConversationFlow(
+    system_prompt="Test",
+    initial_node="start",
+    nodes=[
+        FlowNode(
+            id="start",
+            name="Start",
+            edges=[
+                Edge(
+                    condition="Got name",
+                    id="collect_name",
+                    target_node_id="end",
+                    input_schema={
+                        "type": "object",
+                        "properties": {"name": {"type": "string"}},
+                    },
+                ),
+                Edge(condition="Skip", id="skip", target_node_id="end"),
+            ],
+        ),
+        FlowNode(id="end", name="End", static_text="Bye"),
+    ],
+)
+
+
+class RecordingHandler:
+    def __init__(self):
+        self.calls = []
+
+    async def handle_transition(self, target_node_id, edge_id):
+        self.calls.append(("transition", target_node_id, edge_id))
+
+    async def handle_data_collection(self, collected_data, target_node_id, edge_id):
+        self.calls.append(("collect", collected_data, target_node_id, edge_id))
+
+
+def test_tools_are_shared_across_agents():
+    first = FlowAgent(flow=flow)
+    second = FlowAgent(flow=flow)
+
+    assert [t.id for t in first.tools] == ["collect_name", "skip"]
+    assert all(a is b for a, b in zip(first.tools, second.tools))
+
+
+async def test_tools_dispatch_to_the_active_agent():
+    handler = RecordingHandler()
+    context = SimpleNamespace(session=SimpleNamespace(current_agent=handler))
+    collect, skip = get_tool_factory().tools_for_node(compile_flow(flow).nodes["start"])
+
+    await collect({"name": "Ann"}, context)
+    await skip(context)
+
+    assert handler.calls == [
+        ("collect", {"name": "Ann"}, "end", "collect_name"),
+        ("transition", "end", "skip"),
+    ]